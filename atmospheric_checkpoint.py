@@ -0,0 +1,188 @@
+"""
+Climate Model - Checkpoint and Restart
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Persists the gridded AtmosphericState (v10) as memory-mapped .npy files so
+long runs can restart after a crash. Each checkpoint is written into a
+temporary directory, renamed into place, and only then published by
+atomically replacing the LATEST pointer file, so a crash mid-write never
+leaves a torn checkpoint behind. Restart maps the files back in
+copy-on-write: nothing is read until the model touches it, and the
+checkpoint on disk is never modified by the resumed run.
+
+Layout:
+    <directory>/LATEST                  name of the newest complete checkpoint
+    <directory>/checkpoint-000042/      one directory per checkpoint
+        temperature.npy ... humidity.npy
+        meta.json                       timestamp, step, shapes and dtypes
+"""
+
+import os
+import json
+import shutil
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from atmospheric_dynamics_v10 import AtmosphericState, STATE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+LATEST = 'LATEST'
+PREFIX = 'checkpoint-'
+
+
+def _fsync_directory(path: Path) -> None:
+    """Flush a directory entry to disk where the platform allows it"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return  # Directories cannot be opened on Windows
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class CheckpointManager:
+    """
+    Writes and restores memory-mapped checkpoints of the atmospheric state.
+    Keeps the newest `keep` checkpoints and prunes older ones.
+    """
+
+    def __init__(self, directory: str, keep: int = 2, mmap_mode: str = 'c'):
+        """
+        Initialize the checkpoint manager.
+
+        Args:
+            directory (str): Directory holding the checkpoints
+            keep (int): Number of complete checkpoints to retain
+            mmap_mode (str): numpy mmap mode used on restart ('c' copy-on-write,
+                             'r' read-only, 'r+' writes back to the checkpoint)
+        """
+        if keep < 1:
+            raise ValueError("At least one checkpoint must be kept")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+        self.mmap_mode = mmap_mode
+
+    def list_checkpoints(self) -> List[Path]:
+        """Complete checkpoints, oldest first"""
+        return sorted(p for p in self.directory.glob(f'{PREFIX}*')
+                      if p.is_dir() and (p / 'meta.json').exists())
+
+    def latest_path(self) -> Optional[Path]:
+        """Checkpoint named by the LATEST pointer, if any"""
+        pointer = self.directory / LATEST
+        if not pointer.exists():
+            return None
+        path = self.directory / pointer.read_text().strip()
+        return path if (path / 'meta.json').exists() else None
+
+    def save(self, state: AtmosphericState, step: int = 0) -> Path:
+        """
+        Write a checkpoint and publish it as the latest.
+
+        Args:
+            state (AtmosphericState): State to persist
+            step (int): Model step count at this state
+
+        Returns:
+            Path: Directory of the new checkpoint
+        """
+        existing = self.list_checkpoints()
+        sequence = int(existing[-1].name[len(PREFIX):]) + 1 if existing else 0
+        name = f"{PREFIX}{sequence:06d}"
+        final = self.directory / name
+        staging = self.directory / f".{name}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir()
+
+        try:
+            fields = {}
+            for field in STATE_FIELDS:
+                data = getattr(state, field)
+                mapped = np.lib.format.open_memmap(
+                    staging / f"{field}.npy", mode='w+', dtype=data.dtype, shape=data.shape
+                )
+                mapped[...] = data
+                mapped.flush()
+                del mapped
+                fields[field] = {'dtype': data.dtype.str, 'shape': list(data.shape)}
+
+            meta = {'timestamp': state.timestamp.isoformat(), 'step': step, 'fields': fields}
+            with open(staging / 'meta.json', 'w') as f:
+                json.dump(meta, f)
+                f.flush()
+                os.fsync(f.fileno())
+            _fsync_directory(staging)
+
+            os.replace(staging, final)
+            pointer_tmp = self.directory / f".{LATEST}.tmp"
+            with open(pointer_tmp, 'w') as f:
+                f.write(name)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(pointer_tmp, self.directory / LATEST)
+            _fsync_directory(self.directory)
+        except Exception as e:
+            logger.error(f"Error writing checkpoint {name}: {str(e)}")
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        logger.info(f"Checkpoint {name} written (step {step}, {state.timestamp})")
+        self.prune()
+        return final
+
+    def prune(self) -> None:
+        """Delete checkpoints older than the newest `keep`"""
+        latest = self.latest_path()
+        for path in self.list_checkpoints()[:-self.keep]:
+            if path == latest:
+                continue
+            try:
+                shutil.rmtree(path)
+            except OSError as e:
+                # Still mapped by a running model on platforms that lock open files
+                logger.warning(f"Could not remove checkpoint {path.name}: {str(e)}")
+
+    def load(self, path: Path) -> Tuple[AtmosphericState, int]:
+        """
+        Map a checkpoint back into an AtmosphericState without copying it.
+
+        Args:
+            path (Path): Checkpoint directory
+
+        Returns:
+            Tuple[AtmosphericState, int]: Restored state and its step count
+        """
+        path = Path(path)
+        with open(path / 'meta.json') as f:
+            meta = json.load(f)
+        fields = {field: np.load(path / f"{field}.npy", mmap_mode=self.mmap_mode)
+                  for field in STATE_FIELDS}
+        state = AtmosphericState(**fields,
+                                 timestamp=datetime.fromisoformat(meta['timestamp']))
+        logger.info(f"Checkpoint {path.name} mapped (step {meta['step']}, {state.timestamp})")
+        return state, meta['step']
+
+    def load_latest(self) -> Optional[Tuple[AtmosphericState, int]]:
+        """
+        Map the latest checkpoint, if one exists.
+
+        Returns:
+            Optional[Tuple[AtmosphericState, int]]: Restored state and step count
+        """
+        path = self.latest_path()
+        if path is None:
+            return None
+        return self.load(path)
@@ -3,14 +3,22 @@ from datetime import datetime
 import logging
 
 class AtmosphericDynamicsModule:
+    OMEGA = 7.2921e-5  # Earth's angular velocity (rad/s)
+    DRY_ADIABATIC_LAPSE_RATE = 0.0098  # °C/m
+
+    # Categorical stability codes of the batch diagnostics
+    UNKNOWN, STABLE, NEUTRAL, UNSTABLE = -1, 0, 1, 2
+    STABILITY_LABELS = {STABLE: "Stable", NEUTRAL: "Neutral", UNSTABLE: "Unstable"}
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
+        self.coriolis_cache = {}  # latitude -> Coriolis parameter
         
-    def calculate_pressure_gradient(self, pressure_values, distance):
-        """Calculate pressure gradient force"""
+    def calculate_pressure_gradient(self, pressure_values, distance, axis=-1):
+        """Calculate pressure gradient force along an axis of the pressure array"""
         try:
-            return np.diff(pressure_values) / distance
+            return np.diff(pressure_values, axis=axis) / distance
         except Exception as e:
             self.logger.error(f"Error calculating pressure gradient: {e}")
             return None
@@ -18,8 +26,7 @@ class AtmosphericDynamicsModule:
     def calculate_coriolis_force(self, wind_speed, latitude):
         """Calculate Coriolis force"""
         try:
-            omega = 7.2921e-5  # Earth's angular velocity (rad/s)
-            f = 2 * omega * np.sin(np.radians(latitude))  # Coriolis parameter
+            f = 2 * self.OMEGA * np.sin(np.radians(latitude))  # Coriolis parameter
             return f * wind_speed
         except Exception as e:
             self.logger.error(f"Error calculating Coriolis force: {e}")
@@ -29,7 +36,7 @@ class AtmosphericDynamicsModule:
         """Calculate atmospheric stability using temperature lapse rate"""
         try:
             lapse_rate = -np.diff(temperature_profile) / np.diff(height_profile)
-            dry_adiabatic_lapse_rate = 0.0098  # °C/m
+            dry_adiabatic_lapse_rate = self.DRY_ADIABATIC_LAPSE_RATE
             
             if np.mean(lapse_rate) < dry_adiabatic_lapse_rate:
                 return "Stable"
@@ -39,4 +46,43 @@ class AtmosphericDynamicsModule:
                 return "Neutral"
         except Exception as e:
             self.logger.error(f"Error calculating atmospheric stability: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def coriolis_parameters(self, latitudes):
+        """Coriolis parameters of many latitudes, cached per latitude"""
+        latitudes = np.asarray(latitudes, dtype=float).ravel()
+        missing = [lat for lat in np.unique(latitudes).tolist() if lat not in self.coriolis_cache]
+        if missing:
+            values = 2 * self.OMEGA * np.sin(np.radians(missing))
+            self.coriolis_cache.update(zip(missing, values.tolist()))
+        return np.array([self.coriolis_cache[lat] for lat in latitudes.tolist()])
+
+    def calculate_coriolis_force_batch(self, wind_speed, latitudes):
+        """Calculate Coriolis force for wind speeds with locations on the first axis"""
+        wind_speed = np.asarray(wind_speed, dtype=float)
+        f = self.coriolis_parameters(latitudes)
+        return f.reshape(f.shape + (1,) * (wind_speed.ndim - 1)) * wind_speed
+
+    def calculate_lapse_rates(self, temperature, heights):
+        """Calculate layer lapse rates of (N_locations, N_levels, N_times) temperature profiles"""
+        temperature = np.asarray(temperature, dtype=float)
+        heights = np.asarray(heights, dtype=float)
+        if heights.ndim == 1:
+            heights = heights[None, :, None]
+        return -np.diff(temperature, axis=1) / np.diff(heights, axis=1)
+
+    def calculate_atmospheric_stability_batch(self, temperature, heights):
+        """Calculate stability codes and mean lapse rates, shaped (N_locations, N_times)"""
+        lapse_rate = self.calculate_lapse_rates(temperature, heights).mean(axis=1)
+        codes = np.select(
+            [lapse_rate < self.DRY_ADIABATIC_LAPSE_RATE,
+             lapse_rate > self.DRY_ADIABATIC_LAPSE_RATE,
+             lapse_rate == self.DRY_ADIABATIC_LAPSE_RATE],
+            [self.STABLE, self.UNSTABLE, self.NEUTRAL],
+            default=self.UNKNOWN
+        ).astype(np.int8)
+        return codes, lapse_rate
+
+    def stability_label(self, code):
+        """Label of a stability code, None for UNKNOWN"""
+        return self.STABILITY_LABELS.get(int(code))
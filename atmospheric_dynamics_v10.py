@@ -16,8 +16,11 @@ import pandas as pd
 from typing import Dict, List, Tuple, Optional
 import logging
 from dataclasses import dataclass
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
 import psycopg2
+from atmospheric_solvers import FFTHelmholtzSolver, MultigridHelmholtzSolver, periodic_gradient
+from state_validation import StateValidator, StateValidationError
 
 # Configure logging
 logging.basicConfig(
@@ -30,9 +33,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Gridded fields carried by AtmosphericState
+STATE_FIELDS = ('temperature', 'pressure', 'wind_u', 'wind_v', 'humidity')
+
+# Semi-implicit pressure solvers; 'explicit' keeps the original forward step
+PRESSURE_SOLVERS = ('explicit', 'fft', 'multigrid')
+
+# Axes of the gridded fields, counted from the end so that an optional
+# leading ensemble axis, (n_members, ny, nx, nz), passes through every kernel
+Y_AXIS, X_AXIS = -3, -2
+
+# Precision modes: (storage dtype, tendency dtype)
+PRECISIONS = {
+    'float64': (np.float64, np.float64),
+    'float32': (np.float32, np.float32),
+    'mixed': (np.float32, np.float64)   # float32 fields, float64 tendencies
+}
+
 @dataclass
 class AtmosphericState:
-    """Standardized data structure for atmospheric conditions"""
+    """
+    Standardized data structure for atmospheric conditions.
+    Fields are shaped (ny, nx, nz), or (n_members, ny, nx, nz) for an ensemble.
+    """
     temperature: np.ndarray  # Temperature field in Kelvin
     pressure: np.ndarray    # Pressure field in hPa
     wind_u: np.ndarray     # Zonal wind component in m/s
@@ -40,6 +63,23 @@ class AtmosphericState:
     humidity: np.ndarray   # Specific humidity in kg/kg
     timestamp: datetime    # Current simulation time
 
+    def astype(self, dtype) -> 'AtmosphericState':
+        """Return a copy of the state with every field cast to dtype"""
+        return AtmosphericState(
+            **{name: getattr(self, name).astype(dtype) for name in STATE_FIELDS},
+            timestamp=self.timestamp
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the gridded fields"""
+        return sum(getattr(self, name).nbytes for name in STATE_FIELDS)
+
+    @property
+    def ensemble_size(self) -> Optional[int]:
+        """Number of ensemble members, or None for a single deterministic state"""
+        return self.temperature.shape[0] if self.temperature.ndim == 4 else None
+
 class AtmosphericDynamics:
     """
     Expert module for atmospheric dynamics simulation.
@@ -56,8 +96,14 @@ class AtmosphericDynamics:
         """
         self.config = config
         self.state = None
+        self.step_count = 0
+        self.surface_temperature = None  # Coupled fields, held by reference
+        self.radiation_flux = None
+        self.checkpoints = None  # CheckpointManager last saved to, used for rollback
         self.initialize_grid()
         self.setup_physical_constants()
+        self.setup_numerics()
+        self.setup_validation()
         logger.info("Atmospheric Dynamics module initialized")
 
     def initialize_grid(self) -> None:
@@ -65,6 +111,7 @@ class AtmosphericDynamics:
         try:
             self.dx = self.config['spatial']['dx']  # Grid spacing in x (meters)
             self.dy = self.config['spatial']['dy']  # Grid spacing in y (meters)
+            self.dz = self.config['spatial'].get('dz', 1000.0)  # Layer depth (meters)
             self.dt = self.config['temporal']['dt'] # Time step (seconds)
             
             # Initialize grid dimensions
@@ -83,6 +130,50 @@ class AtmosphericDynamics:
         self.cp = 1004.0      # Specific heat capacity at constant pressure (J/(kg·K))
         self.g = 9.81         # Gravitational acceleration (m/s²)
         self.p0 = 1000.0      # Reference pressure (hPa)
+        
+        # Coupling parameters
+        coupling = self.config.get('coupling', {})
+        self.surface_relaxation_time = coupling.get('surface_relaxation_time', 3600.0)  # s
+
+    def setup_numerics(self) -> None:
+        """Select storage and tendency precision from the 'numerics' config section"""
+        numerics = self.config.get('numerics', {})
+        self.precision = numerics.get('precision', 'float64')
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{self.precision}', "
+                             f"expected one of {list(PRECISIONS)}")
+        self.dtype, self.tendency_dtype = PRECISIONS[self.precision]
+        
+        # Optional thread pool for concurrent tendency evaluation
+        self.threads = int(numerics.get('threads', 1))
+        self.executor = ThreadPoolExecutor(max_workers=self.threads) if self.threads > 1 else None
+        
+        # Pressure/wind coupling: 'fft' (doubly periodic) or 'multigrid' (closed
+        # boundaries) add a linear pressure tendency and treat it implicitly
+        self.pressure_solver = numerics.get('pressure_solver', 'explicit')
+        if self.pressure_solver not in PRESSURE_SOLVERS:
+            raise ValueError(f"Unknown pressure solver '{self.pressure_solver}', "
+                             f"expected one of {list(PRESSURE_SOLVERS)}")
+        self.wave_speed = numerics.get('wave_speed', 300.0)  # Fastest wave speed (m/s)
+        self.implicit_weight = numerics.get('implicit_weight', 0.55)  # 0.5 = Crank-Nicolson
+        if not 0.5 <= self.implicit_weight <= 1.0:
+            raise ValueError("implicit_weight must lie in [0.5, 1] for a stable scheme")
+        if self.pressure_solver == 'fft':
+            self.helmholtz = FFTHelmholtzSolver(self.ny, self.nx, self.dx, self.dy)
+        elif self.pressure_solver == 'multigrid':
+            self.helmholtz = MultigridHelmholtzSolver(self.dx, self.dy)
+        else:
+            self.helmholtz = None
+
+    def setup_validation(self) -> None:
+        """Configure periodic state validation from the 'validation' config section"""
+        validation = self.config.get('validation', {})
+        self.validator = StateValidator(
+            interval=validation.get('interval', 10),
+            bounds=validation.get('bounds'),
+            block_size=validation.get('block_size', 1 << 16)
+        )
+        self.rollback = validation.get('rollback', False)
 
     def initialize(self, initial_state: AtmosphericState) -> None:
         """
@@ -92,6 +183,8 @@ class AtmosphericDynamics:
             initial_state (AtmosphericState): Initial conditions
         """
         self.state = initial_state
+        for name in STATE_FIELDS:
+            setattr(self.state, name, np.asarray(getattr(self.state, name), dtype=self.dtype))
         self.validate_state()
         logger.info("Atmospheric state initialized")
 
@@ -100,18 +193,29 @@ class AtmosphericDynamics:
         Validate the current atmospheric state.
         
         Returns:
-            bool: True if state is valid, raises ValueError otherwise
+            bool: True if state is valid, raises StateValidationError otherwise
         """
         if self.state is None:
             raise ValueError("Atmospheric state not initialized")
             
-        # Check for physical consistency
-        if np.any(self.state.temperature < 0):
-            raise ValueError("Negative absolute temperatures detected")
-        if np.any(self.state.pressure < 0):
-            raise ValueError("Negative pressures detected")
-            
-        return True
+        # Check for NaN/Inf and physical bounds
+        failure = self.validator.check(self.state, self.step_count)
+        if failure is None:
+            return True
+        
+        rolled_back = False
+        if self.rollback and self.checkpoints is not None:
+            self.rollback = False  # A bad checkpoint must not trigger another rollback
+            try:
+                rolled_back = self.restore_checkpoint(self.checkpoints)
+            except Exception as e:
+                logger.error(f"Rollback after failed validation failed: {e}")
+                raise StateValidationError(failure) from e
+            finally:
+                self.rollback = True
+            if rolled_back:
+                logger.warning(f"Rolled back to step {self.step_count} after: {failure}")
+        raise StateValidationError(failure, rolled_back)
 
     def compute_pressure_gradient(self) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -121,8 +225,9 @@ class AtmosphericDynamics:
             Tuple[np.ndarray, np.ndarray]: Pressure gradient components (x, y)
         """
         try:
-            dpx = np.gradient(self.state.pressure, self.dx, axis=1)
-            dpy = np.gradient(self.state.pressure, self.dy, axis=0)
+            pressure = self.state.pressure.astype(self.tendency_dtype, copy=False)
+            dpx = np.gradient(pressure, self.dx, axis=X_AXIS)
+            dpy = np.gradient(pressure, self.dy, axis=Y_AXIS)
             return dpx, dpy
         except Exception as e:
             logger.error(f"Error computing pressure gradient: {str(e)}")
@@ -136,8 +241,9 @@ class AtmosphericDynamics:
             np.ndarray: Temperature tendency due to advection
         """
         try:
-            dtx = np.gradient(self.state.temperature, self.dx, axis=1)
-            dty = np.gradient(self.state.temperature, self.dy, axis=0)
+            temperature = self.state.temperature.astype(self.tendency_dtype, copy=False)
+            dtx = np.gradient(temperature, self.dx, axis=X_AXIS)
+            dty = np.gradient(temperature, self.dy, axis=Y_AXIS)
             
             advection = -(self.state.wind_u * dtx + 
                          self.state.wind_v * dty)
@@ -146,6 +252,95 @@ class AtmosphericDynamics:
             logger.error(f"Error computing temperature advection: {str(e)}")
             raise
 
+    def compute_tendencies(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Calculate all tendency terms needed for one time step.
+        
+        With a thread pool, the four horizontal derivatives are evaluated
+        concurrently over vertical slabs (NumPy releases the GIL inside them),
+        then combined into the advection term. Results are identical to the
+        serial path.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: Pressure gradient (x, y)
+                                                       and temperature advection
+        """
+        if self.executor is None:
+            dpx, dpy = self.compute_pressure_gradient()
+            return dpx, dpy, self.compute_temperature_advection()
+        
+        try:
+            pressure = self.state.pressure.astype(self.tendency_dtype, copy=False)
+            temperature = self.state.temperature.astype(self.tendency_dtype, copy=False)
+            dpx, dpy = np.empty_like(pressure), np.empty_like(pressure)
+            dtx, dty = np.empty_like(temperature), np.empty_like(temperature)
+            advection = np.empty(temperature.shape,
+                                 np.result_type(self.state.wind_u, temperature))
+            
+            nz = temperature.shape[-1]
+            bounds = np.linspace(0, nz, min(self.threads, nz) + 1).round().astype(int)
+            slabs = [slice(k0, k1) for k0, k1 in zip(bounds[:-1], bounds[1:])]
+            
+            def derivative(out, field, spacing, axis, zs):
+                out[..., zs] = np.gradient(field[..., zs], spacing, axis=axis)
+            
+            def combine(zs):
+                advection[..., zs] = -(self.state.wind_u[..., zs] * dtx[..., zs] +
+                                       self.state.wind_v[..., zs] * dty[..., zs])
+            
+            terms = [(dpx, pressure, self.dx, X_AXIS), (dpy, pressure, self.dy, Y_AXIS),
+                     (dtx, temperature, self.dx, X_AXIS), (dty, temperature, self.dy, Y_AXIS)]
+            futures = [self.executor.submit(derivative, *term, zs)
+                       for term in terms for zs in slabs]
+            for future in wait(futures).done:
+                future.result()
+            for future in wait([self.executor.submit(combine, zs) for zs in slabs]).done:
+                future.result()
+            return dpx, dpy, advection
+        except Exception as e:
+            logger.error(f"Error computing tendencies: {str(e)}")
+            raise
+
+    def semi_implicit_adjustment(self, dt: float) -> None:
+        """
+        Advance wind and pressure together, treating the fast waves implicitly.
+        
+        Linearised about the level-mean pressure p̄, the coupled system
+            du/dt = -(1/p̄) ∇p,   dp/dt = -c² p̄ ∇·u
+        is time-weighted with α = implicit_weight (X* = αX' + (1-α)X), which
+        reduces to one Helmholtz problem per level,
+            (I - α²c²dt² ∇²) p' = p - dt c² p̄ ∇·(u - α(1-α) (dt/p̄) ∇p),
+        followed by u' = u - (dt/p̄) ∇p*. The scheme is stable for any dt
+        when α >= 0.5; α slightly above 0.5 damps the shortest waves.
+        
+        Args:
+            dt (float): Time step in seconds
+        """
+        try:
+            alpha = self.implicit_weight
+            c2 = self.wave_speed ** 2
+            if self.pressure_solver == 'fft':
+                gradient = lambda f, spacing, axis: periodic_gradient(f, spacing, axis)
+            else:
+                gradient = lambda f, spacing, axis: np.gradient(f, spacing, axis=axis)
+            
+            pressure = self.state.pressure.astype(self.tendency_dtype, copy=False)
+            mean_pressure = pressure.mean(axis=(Y_AXIS, X_AXIS), keepdims=True)
+            scale = alpha * (1 - alpha) * dt / mean_pressure
+            u = self.state.wind_u - scale * gradient(pressure, self.dx, X_AXIS)
+            v = self.state.wind_v - scale * gradient(pressure, self.dy, Y_AXIS)
+            divergence = gradient(u, self.dx, X_AXIS) + gradient(v, self.dy, Y_AXIS)
+            rhs = pressure - dt * c2 * mean_pressure * divergence
+            new_pressure = self.helmholtz.solve(rhs, (alpha * self.wave_speed * dt) ** 2)
+            
+            weighted = alpha * new_pressure + (1 - alpha) * pressure
+            self.state.wind_u += -dt / mean_pressure * gradient(weighted, self.dx, X_AXIS)
+            self.state.wind_v += -dt / mean_pressure * gradient(weighted, self.dy, Y_AXIS)
+            self.state.pressure[...] = new_pressure
+        except Exception as e:
+            logger.error(f"Error in semi-implicit pressure adjustment: {str(e)}")
+            raise
+
     def update(self, dt: float) -> AtmosphericState:
         """
         Update atmospheric state for one time step.
@@ -157,25 +352,81 @@ class AtmosphericDynamics:
             AtmosphericState: Updated atmospheric state
         """
         try:
-            # Compute dynamics
-            dpx, dpy = self.compute_pressure_gradient()
-            temp_advection = self.compute_temperature_advection()
-            
-            # Update wind components (simplified momentum equation)
-            self.state.wind_u += -1/self.state.pressure * dpx * dt
-            self.state.wind_v += -1/self.state.pressure * dpy * dt
+            if self.helmholtz is None:
+                # Compute dynamics
+                dpx, dpy, temp_advection = self.compute_tendencies()
+                
+                # Update wind components (simplified momentum equation);
+                # tendencies are summed in tendency_dtype, then stored in dtype
+                pressure = self.state.pressure.astype(self.tendency_dtype, copy=False)
+                self.state.wind_u += -1/pressure * dpx * dt
+                self.state.wind_v += -1/pressure * dpy * dt
+            else:
+                # Advection uses the winds from the start of the step
+                temp_advection = self.compute_temperature_advection()
+                self.semi_implicit_adjustment(dt)
             
             # Update temperature (simplified thermodynamic equation)
             self.state.temperature += temp_advection * dt
             
+            # Apply forcing received from coupled modules
+            self.apply_coupling(dt)
+            
             # Update timestamp
-            self.state.timestamp += datetime.timedelta(seconds=dt)
+            self.state.timestamp += timedelta(seconds=dt)
+            self.step_count += 1
+            
+            # Periodic NaN/Inf and bounds check
+            if self.validator.due(self.step_count):
+                self.validate_state()
             
             return self.state
         except Exception as e:
             logger.error(f"Error in atmospheric state update: {str(e)}")
             raise
 
+    def apply_coupling(self, dt: float) -> None:
+        """
+        Apply surface and radiative forcing to the lowest model level.
+        
+        Args:
+            dt (float): Time step in seconds
+        """
+        if self.surface_temperature is None and self.radiation_flux is None:
+            return
+        lowest = self.state.temperature[..., 0]
+        heating = np.zeros(lowest.shape, dtype=self.tendency_dtype)
+        if self.surface_temperature is not None:
+            heating += (self.surface_temperature - lowest) / self.surface_relaxation_time
+        if self.radiation_flux is not None:
+            # Net flux (W/m²) absorbed by the lowest layer: F / (rho * cp * dz)
+            pressure = self.state.pressure[..., 0].astype(self.tendency_dtype, copy=False)
+            density = pressure * 100 / (self.R * lowest)
+            heating += self.radiation_flux / (density * self.cp * self.dz)
+        lowest += heating * dt
+
+    def process_surface_coupling(self, surface_temperature: np.ndarray) -> None:
+        """
+        Accept surface temperature (K) from a surface or ocean module.
+        The array is kept by reference; the lowest level relaxes towards it.
+        
+        Args:
+            surface_temperature (np.ndarray): Field broadcastable to (ny, nx)
+        """
+        np.broadcast_shapes(np.shape(surface_temperature), self.state.temperature.shape[:-1])
+        self.surface_temperature = surface_temperature
+
+    def process_radiation_coupling(self, radiation_flux: np.ndarray) -> None:
+        """
+        Accept net radiative flux (W/m²) absorbed at the lowest level.
+        The array is kept by reference.
+        
+        Args:
+            radiation_flux (np.ndarray): Field broadcastable to (ny, nx)
+        """
+        np.broadcast_shapes(np.shape(radiation_flux), self.state.temperature.shape[:-1])
+        self.radiation_flux = radiation_flux
+
     def get_output(self) -> Dict:
         """
         Prepare standardized output for the orchestrator.
@@ -192,6 +443,44 @@ class AtmosphericDynamics:
             'timestamp': self.state.timestamp
         }
 
+    def save_checkpoint(self, checkpoints) -> str:
+        """
+        Validate and persist the current state through a checkpoint manager,
+        which is then used for rollback when validation is configured for it.
+        
+        Args:
+            checkpoints: CheckpointManager (atmospheric_checkpoint) to write to
+            
+        Returns:
+            str: Path of the written checkpoint
+        """
+        self.validate_state()  # Never publish a bad state as the last good one
+        self.checkpoints = checkpoints
+        return str(checkpoints.save(self.state, self.step_count))
+
+    def restore_checkpoint(self, checkpoints) -> bool:
+        """
+        Resume from the latest checkpoint of a checkpoint manager.
+        
+        Args:
+            checkpoints: CheckpointManager (atmospheric_checkpoint) to read from
+            
+        Returns:
+            bool: True if a checkpoint was restored, False if none exists
+        """
+        restored = checkpoints.load_latest()
+        if restored is None:
+            return False
+        state, self.step_count = restored
+        self.initialize(state)
+        return True
+
+    def close(self) -> None:
+        """Release the tendency thread pool, if any"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
     def receive_input(self, data: Dict) -> None:
         """
         Handle incoming data from other modules via the orchestrator.
@@ -209,6 +498,134 @@ class AtmosphericDynamics:
             logger.error(f"Error processing input data: {str(e)}")
             raise
 
+def make_ensemble(state: AtmosphericState, n_members: int,
+                  perturbations: Optional[Dict[str, float]] = None,
+                  seed: Optional[int] = None) -> AtmosphericState:
+    """
+    Build an ensemble state with a leading member axis.
+    
+    Each field is drawn straight into its (n_members, ny, nx, nz) array as
+    base + scale * N(0, 1); no per-member copies or full-size temporaries
+    are created.
+    
+    Args:
+        state (AtmosphericState): Unperturbed (ny, nx, nz) state
+        n_members (int): Number of ensemble members
+        perturbations (Dict[str, float]): Standard deviation of the Gaussian
+                                          perturbation per field name
+        seed (Optional[int]): Random seed for reproducible ensembles
+        
+    Returns:
+        AtmosphericState: Ensemble state
+    """
+    if state.ensemble_size is not None:
+        raise ValueError("State already has an ensemble axis")
+    perturbations = perturbations or {}
+    unknown = set(perturbations) - set(STATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields in perturbations: {sorted(unknown)}")
+    
+    rng = np.random.default_rng(seed)
+    fields = {}
+    for name in STATE_FIELDS:
+        base = getattr(state, name)
+        members = np.empty((n_members,) + base.shape, dtype=base.dtype)
+        scale = perturbations.get(name, 0.0)
+        if scale:
+            rng.standard_normal(out=members, dtype=members.dtype)
+            members *= scale
+            members += base
+        else:
+            members[...] = base
+        fields[name] = members
+    return AtmosphericState(**fields, timestamp=state.timestamp)
+
+def ensemble_mean(state: AtmosphericState) -> Dict[str, np.ndarray]:
+    """
+    Compute the ensemble mean of every field.
+    
+    Args:
+        state (AtmosphericState): Ensemble state
+        
+    Returns:
+        Dict[str, np.ndarray]: Mean (ny, nx, nz) field per name
+    """
+    if state.ensemble_size is None:
+        raise ValueError("State has no ensemble axis")
+    return {name: np.add.reduce(getattr(state, name), axis=0, dtype=np.float64) / state.ensemble_size
+            for name in STATE_FIELDS}
+
+def ensemble_spread(state: AtmosphericState,
+                    mean: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+    """
+    Compute the ensemble standard deviation of every field.
+    
+    Deviations are accumulated member by member, so only single-member
+    temporaries are created.
+    
+    Args:
+        state (AtmosphericState): Ensemble state
+        mean (Dict[str, np.ndarray]): Precomputed ensemble_mean, if available
+        
+    Returns:
+        Dict[str, np.ndarray]: Spread (ny, nx, nz) field per name
+    """
+    mean = mean or ensemble_mean(state)
+    spread = {}
+    for name in STATE_FIELDS:
+        variance = np.zeros(mean[name].shape, dtype=np.float64)
+        for member in getattr(state, name):
+            deviation = member - mean[name]
+            deviation *= deviation
+            variance += deviation
+        variance /= max(state.ensemble_size - 1, 1)
+        spread[name] = np.sqrt(variance, out=variance)
+    return spread
+
+def compare_precision(config: Dict, initial_state: AtmosphericState,
+                      n_steps: int, precision: str = 'float32') -> Dict[str, Dict[str, float]]:
+    """
+    Validate a reduced-precision run against a float64 reference.
+    
+    Args:
+        config (Dict): Model configuration
+        initial_state (AtmosphericState): Initial conditions (left unmodified)
+        n_steps (int): Number of time steps to run
+        precision (str): Precision mode under test
+        
+    Returns:
+        Dict[str, Dict[str, float]]: Per-field max absolute, max relative and
+                                     RMS divergence from the reference run
+    """
+    runs = {}
+    for mode in ('float64', precision):
+        run_config = dict(config, numerics=dict(config.get('numerics', {}), precision=mode))
+        model = AtmosphericDynamics(run_config)
+        try:
+            model.initialize(initial_state.astype(PRECISIONS[mode][0]))
+            for _ in range(n_steps):
+                model.update(run_config['temporal']['dt'])
+            runs[mode] = model.state
+        finally:
+            model.close()
+    
+    report = {}
+    for name in STATE_FIELDS:
+        reference = getattr(runs['float64'], name)
+        diff = np.abs(getattr(runs[precision], name).astype(np.float64) - reference)
+        scale = np.maximum(np.abs(reference), np.finfo(np.float64).tiny)
+        report[name] = {
+            'max_abs': float(diff.max()),
+            'max_rel': float((diff / scale).max()),
+            'rms': float(np.sqrt(np.mean(diff ** 2)))
+        }
+        logger.info(f"{precision} vs float64 after {n_steps} steps - {name}: "
+                    f"max abs {report[name]['max_abs']:.3e}, "
+                    f"max rel {report[name]['max_rel']:.3e}")
+    logger.info(f"State memory: {runs['float64'].nbytes / 1e6:.1f} MB (float64) vs "
+                f"{runs[precision].nbytes / 1e6:.1f} MB ({precision})")
+    return report
+
 def main():
     """Test function for the Atmospheric Dynamics module"""
     # Example configuration
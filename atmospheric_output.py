@@ -0,0 +1,267 @@
+"""
+Climate Model - Asynchronous Snapshot Output
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Moves model output off the stepping path. At every output interval the
+SnapshotWriter copies the state into one of two preallocated buffers and
+hands it to a background thread, which stores each field as chunked,
+zlib-compressed arrays (one chunk per horizontal tile and level) while the
+model keeps stepping. SnapshotReader pulls sub-regions back by decoding only
+the chunks that intersect the request.
+
+Layout (zarr-like, no extra dependency):
+    <directory>/snapshot-00000120/
+        meta.json                   timestamp, step, shapes, dtypes, chunk shape
+        temperature/0.0.0 ...       one compressed chunk per (y tile, x tile, level)
+"""
+
+import json
+import zlib
+import queue
+import shutil
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from atmospheric_dynamics_v10 import AtmosphericState, STATE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'snapshot-'
+
+
+def _chunk_ranges(n: int, size: int):
+    """Yield (index, start, stop) for chunks of `size` along an axis of length n"""
+    for i, start in enumerate(range(0, n, size)):
+        yield i, start, min(start + size, n)
+
+
+class SnapshotWriter:
+    """
+    Double-buffered, background writer for periodic state snapshots.
+    Stepping only pays for one memory copy per snapshot; compression and disk
+    I/O run on a worker thread.
+    """
+
+    def __init__(self, directory: str, interval: int = 1,
+                 chunks: Optional[Tuple[int, int]] = None, compression_level: int = 1):
+        """
+        Initialize the snapshot writer.
+
+        Args:
+            directory (str): Output directory
+            interval (int): Write a snapshot every `interval` model steps
+            chunks (Tuple[int, int]): Chunk extent along y and x (default: whole level)
+            compression_level (int): zlib compression level (0-9)
+        """
+        if interval < 1:
+            raise ValueError("Output interval must be at least one step")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.chunks = chunks
+        self.compression_level = compression_level
+
+        self._free = queue.Queue()
+        self._pending = queue.Queue()
+        self._buffers_shape = None
+        self._error: Optional[Exception] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='snapshot-writer', daemon=True)
+        self._thread.start()
+
+    def _check_error(self) -> None:
+        """Re-raise a failure of the background thread in the caller"""
+        if self._error is not None:
+            raise RuntimeError(f"Snapshot writer failed: {self._error}") from self._error
+
+    def _allocate(self, state: AtmosphericState) -> None:
+        """Create the two snapshot buffers matching the state layout"""
+        for _ in range(2):
+            self._free.put({name: np.empty_like(getattr(state, name)) for name in STATE_FIELDS})
+        self._buffers_shape = {name: (getattr(state, name).shape, getattr(state, name).dtype)
+                               for name in STATE_FIELDS}
+
+    def submit(self, state: AtmosphericState, step: int) -> bool:
+        """
+        Snapshot the state if `step` falls on the output interval.
+
+        Blocks only when both buffers are still queued for writing.
+
+        Args:
+            state (AtmosphericState): Live model state
+            step (int): Model step count
+
+        Returns:
+            bool: True if a snapshot was queued
+
+        Raises:
+            RuntimeError: If the writer is closed or its thread failed
+        """
+        self._check_error()
+        if self._closed or not self._thread.is_alive():
+            raise RuntimeError("Snapshot writer is closed")
+        if step % self.interval:
+            return False
+        if state.ensemble_size is not None:
+            raise ValueError("Snapshot ensemble members individually or snapshot the ensemble mean")
+        if self._buffers_shape is None:
+            self._allocate(state)
+        elif any(getattr(state, name).shape != shape or getattr(state, name).dtype != dtype
+                 for name, (shape, dtype) in self._buffers_shape.items()):
+            raise ValueError("State layout changed since the first snapshot")
+
+        buffer = self._free.get()
+        for name in STATE_FIELDS:
+            np.copyto(buffer[name], getattr(state, name))
+        self._pending.put((buffer, step, state.timestamp))
+        return True
+
+    def _run(self) -> None:
+        """Background loop: compress and store queued snapshots"""
+        while True:
+            item = self._pending.get()
+            try:
+                if item is None:
+                    return
+                buffer, step, timestamp = item
+                try:
+                    self.write_snapshot(buffer, step, timestamp)
+                except Exception as e:
+                    logger.error(f"Error writing snapshot at step {step}: {str(e)}")
+                    self._error = e
+                finally:
+                    self._free.put(buffer)
+            finally:
+                self._pending.task_done()
+
+    def write_snapshot(self, fields: Dict[str, np.ndarray], step: int,
+                       timestamp: datetime) -> Path:
+        """
+        Store one snapshot as chunked compressed arrays.
+
+        Args:
+            fields (Dict[str, np.ndarray]): Field arrays shaped (ny, nx, nz)
+            step (int): Model step count
+            timestamp (datetime): Simulation time of the snapshot
+
+        Returns:
+            Path: Directory of the written snapshot
+        """
+        name = f"{PREFIX}{step:08d}"
+        final = self.directory / name
+        staging = self.directory / f".{name}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir()
+
+        meta = {'timestamp': timestamp.isoformat(), 'step': step,
+                'compression': 'zlib', 'fields': {}}
+        for field, data in fields.items():
+            ny, nx, nz = data.shape
+            cy, cx = self.chunks or (ny, nx)
+            (staging / field).mkdir()
+            for iy, y0, y1 in _chunk_ranges(ny, cy):
+                for ix, x0, x1 in _chunk_ranges(nx, cx):
+                    for iz in range(nz):
+                        chunk = np.ascontiguousarray(data[y0:y1, x0:x1, iz])
+                        payload = zlib.compress(chunk, self.compression_level)
+                        (staging / field / f"{iy}.{ix}.{iz}").write_bytes(payload)
+            meta['fields'][field] = {'shape': list(data.shape), 'dtype': data.dtype.str,
+                                     'chunks': [cy, cx, 1]}
+        (staging / 'meta.json').write_text(json.dumps(meta))
+
+        if final.exists():
+            shutil.rmtree(final)
+        staging.rename(final)
+        logger.info(f"Snapshot {name} written ({timestamp})")
+        return final
+
+    def flush(self) -> None:
+        """Block until every queued snapshot is on disk"""
+        self._pending.join()
+        self._check_error()
+
+    def close(self) -> None:
+        """Flush pending snapshots and stop the background thread"""
+        self._closed = True
+        if self._thread.is_alive():
+            self._pending.put(None)
+            self._thread.join()
+        self._check_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class SnapshotReader:
+    """Reads fields, or sub-regions of fields, from a written snapshot"""
+
+    def __init__(self, path: str):
+        """
+        Open a snapshot directory.
+
+        Args:
+            path (str): Snapshot directory written by SnapshotWriter
+        """
+        self.path = Path(path)
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        self.timestamp = datetime.fromisoformat(self.meta['timestamp'])
+        self.step = self.meta['step']
+
+    def read(self, field: str, y: slice = slice(None), x: slice = slice(None),
+             z: slice = slice(None)) -> np.ndarray:
+        """
+        Read a (y, x, z) sub-region of a field, decoding only the chunks it touches.
+
+        Args:
+            field (str): Field name
+            y, x, z (slice): Region to read (unit step only)
+
+        Returns:
+            np.ndarray: The requested region
+        """
+        info = self.meta['fields'][field]
+        shape = info['shape']
+        cy, cx, _ = info['chunks']
+        dtype = np.dtype(info['dtype'])
+        (y0, y1, sy), (x0, x1, sx), (z0, z1, sz) = (
+            s.indices(n) for s, n in zip((y, x, z), shape))
+        if (sy, sx, sz) != (1, 1, 1):
+            raise ValueError("Only unit-step slices are supported")
+
+        out = np.empty((max(y1 - y0, 0), max(x1 - x0, 0), max(z1 - z0, 0)), dtype=dtype)
+        for iy, cy0, cy1 in _chunk_ranges(shape[0], cy):
+            if cy1 <= y0 or cy0 >= y1:
+                continue
+            for ix, cx0, cx1 in _chunk_ranges(shape[1], cx):
+                if cx1 <= x0 or cx0 >= x1:
+                    continue
+                ys = slice(max(y0, cy0), min(y1, cy1))
+                xs = slice(max(x0, cx0), min(x1, cx1))
+                for iz in range(z0, z1):
+                    payload = (self.path / field / f"{iy}.{ix}.{iz}").read_bytes()
+                    chunk = np.frombuffer(zlib.decompress(payload), dtype=dtype)
+                    chunk = chunk.reshape(cy1 - cy0, cx1 - cx0)
+                    out[ys.start - y0:ys.stop - y0, xs.start - x0:xs.stop - x0, iz - z0] = \
+                        chunk[ys.start - cy0:ys.stop - cy0, xs.start - cx0:xs.stop - cx0]
+        return out
+
+    def read_state(self) -> AtmosphericState:
+        """
+        Read the full snapshot back into an AtmosphericState.
+
+        Returns:
+            AtmosphericState: State stored in the snapshot
+        """
+        return AtmosphericState(**{name: self.read(name) for name in STATE_FIELDS},
+                                timestamp=self.timestamp)
@@ -0,0 +1,406 @@
+"""
+Climate Model - Parallel Domain Decomposition
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Runs the gridded AtmosphericDynamics model (v10) across several processes.
+The horizontal domain is split into a regular grid of tiles; every tile keeps
+its fields, plus a one-cell halo on each interior face, in a
+multiprocessing.shared_memory block. Worker processes advance their tile with
+the serial AtmosphericDynamics.update and exchange halos between steps under
+barrier synchronization, so results are identical to a single-process run.
+
+Configuration (optional 'parallel' section of the v10 config):
+    'parallel': {
+        'tiles': [2, 4],          # tiles along y (axis 0) and x (axis 1)
+        'start_method': 'spawn'   # multiprocessing start method
+    }
+"""
+
+import os
+import logging
+import multiprocessing as mp
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from atmospheric_dynamics_v10 import AtmosphericDynamics, AtmosphericState, STATE_FIELDS
+from state_validation import StateValidationError, StateValidator
+
+logger = logging.getLogger(__name__)
+
+FIELDS = STATE_FIELDS
+
+
+@dataclass
+class Tile:
+    """Placement of one tile in the global grid and in shared memory"""
+    index: Tuple[int, int]   # (tile row, tile column)
+    y0: int                  # Global interior bounds along y (axis 0)
+    y1: int
+    x0: int                  # Global interior bounds along x (axis 1)
+    x1: int
+    halo_y: Tuple[int, int]  # Halo width below/above along y (0 at domain edge)
+    halo_x: Tuple[int, int]  # Halo width left/right along x (0 at domain edge)
+    nz: int
+    shm_name: str = ''
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        """Shape of one field including halos"""
+        return (self.y1 - self.y0 + sum(self.halo_y),
+                self.x1 - self.x0 + sum(self.halo_x),
+                self.nz)
+
+    @property
+    def interior(self) -> Tuple[slice, slice]:
+        """Local slices selecting the tile interior"""
+        return (slice(self.halo_y[0], self.halo_y[0] + self.y1 - self.y0),
+                slice(self.halo_x[0], self.halo_x[0] + self.x1 - self.x0))
+
+    @property
+    def extended(self) -> Tuple[slice, slice]:
+        """Global slices covering the tile including halos"""
+        return (slice(self.y0 - self.halo_y[0], self.y1 + self.halo_y[1]),
+                slice(self.x0 - self.halo_x[0], self.x1 + self.halo_x[1]))
+
+
+def split_extent(n: int, parts: int) -> List[Tuple[int, int]]:
+    """Split range(n) into `parts` contiguous, nearly equal intervals"""
+    if parts < 1 or parts > n:
+        raise ValueError(f"Cannot split {n} cells into {parts} tiles")
+    edges = np.linspace(0, n, parts + 1).round().astype(int)
+    return [(int(edges[i]), int(edges[i + 1])) for i in range(parts)]
+
+
+def default_tiles(n_workers: int, ny: int, nx: int) -> Tuple[int, int]:
+    """Choose the tile layout that uses the most workers with the squarest tiles"""
+    best, best_key = (1, 1), None
+    for py in range(1, min(n_workers, ny) + 1):
+        px = min(n_workers // py, nx)
+        key = (py * px, -abs(np.log((ny / py) / (nx / px))))
+        if best_key is None or key > best_key:
+            best, best_key = (py, px), key
+    return best
+
+
+def decompose(shape: Tuple[int, int, int], tiles: Tuple[int, int]) -> List[Tile]:
+    """Build the tile layout for a (ny, nx, nz) domain"""
+    ny, nx, nz = shape
+    py, px = tiles
+    y_bounds = split_extent(ny, py)
+    x_bounds = split_extent(nx, px)
+    layout = []
+    for iy, (y0, y1) in enumerate(y_bounds):
+        for ix, (x0, x1) in enumerate(x_bounds):
+            layout.append(Tile(
+                index=(iy, ix), y0=y0, y1=y1, x0=x0, x1=x1,
+                halo_y=(int(iy > 0), int(iy < py - 1)),
+                halo_x=(int(ix > 0), int(ix < px - 1)),
+                nz=nz
+            ))
+    return layout
+
+
+def _tile_arrays(tile: Tile, shm: shared_memory.SharedMemory, dtype) -> np.ndarray:
+    """View a shared memory block as a (field, y, x, z) array"""
+    return np.ndarray((len(FIELDS),) + tile.shape, dtype=dtype, buffer=shm.buf)
+
+
+def exchange_halos(tile: Tile, layout: Dict[Tuple[int, int], Tile],
+                   arrays: Dict[Tuple[int, int], np.ndarray]) -> None:
+    """
+    Fill the face halos of `tile` from the interiors of its neighbours.
+
+    Only face halos are exchanged: the model differentiates along x and y
+    separately, so corner cells never reach an interior result.
+    """
+    iy, ix = tile.index
+    own = arrays[tile.index]
+    ys, xs = tile.interior
+    if tile.halo_y[0]:
+        north = layout[(iy - 1, ix)]
+        src = arrays[north.index]
+        row = north.interior[0].stop - 1
+        own[:, 0, xs] = src[:, row, north.interior[1]]
+    if tile.halo_y[1]:
+        south = layout[(iy + 1, ix)]
+        src = arrays[south.index]
+        own[:, -1, xs] = src[:, south.interior[0].start, south.interior[1]]
+    if tile.halo_x[0]:
+        west = layout[(iy, ix - 1)]
+        src = arrays[west.index]
+        col = west.interior[1].stop - 1
+        own[:, ys, 0] = src[:, west.interior[0], col]
+    if tile.halo_x[1]:
+        east = layout[(iy, ix + 1)]
+        src = arrays[east.index]
+        own[:, ys, -1] = src[:, east.interior[0], east.interior[1].start]
+
+
+def _tile_worker(config: Dict, layout: List[Tile], index: Tuple[int, int],
+                 dtype: str, timestamp: datetime, barrier, commands, results) -> None:
+    """Worker process: advance one tile and exchange halos on command"""
+    blocks = {}
+    try:
+        tiles = {tile.index: tile for tile in layout}
+        blocks = {i: shared_memory.SharedMemory(name=t.shm_name) for i, t in tiles.items()}
+        arrays = {i: _tile_arrays(tiles[i], blocks[i], dtype) for i in tiles}
+        tile = tiles[index]
+        own = arrays[index]
+
+        tile_config = dict(config)
+        tile_config['spatial'] = dict(config['spatial'],
+                                      ny=tile.shape[0], nx=tile.shape[1], nz=tile.shape[2])
+        model = AtmosphericDynamics(tile_config)
+        model.state = AtmosphericState(
+            **{name: own[k] for k, name in enumerate(FIELDS)},
+            timestamp=timestamp
+        )
+
+        while True:
+            command = commands.get()
+            if command is None:
+                break
+            dt, n_steps = command
+            try:
+                for _ in range(n_steps):
+                    model.update(dt)
+                    barrier.wait()
+                    exchange_halos(tile, tiles, arrays)
+                    barrier.wait()
+                results.put((index, None))
+            except Exception as e:
+                barrier.abort()
+                results.put((index, f"{type(e).__name__}: {e}"))
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+class ParallelAtmosphericDynamics:
+    """
+    Multi-process driver for the v10 AtmosphericDynamics model.
+    Splits the domain into tiles held in shared memory and steps them in parallel.
+    """
+
+    def __init__(self, config: Dict):
+        """
+        Initialize the parallel driver.
+
+        Args:
+            config (Dict): v10 configuration, optionally with a 'parallel' section
+        """
+        if config.get('numerics', {}).get('pressure_solver', 'explicit') != 'explicit':
+            raise ValueError("The semi-implicit pressure solve couples the whole domain "
+                             "and is not supported by the tiled driver")
+        self.config = config
+        parallel = config.get('parallel', {})
+        self.tiles = parallel.get('tiles')
+        self.start_method = parallel.get('start_method')
+        self.layout: List[Tile] = []
+        self.timestamp: Optional[datetime] = None
+        self.dtype = None
+        self._blocks: List[shared_memory.SharedMemory] = []
+        self._arrays: Dict[Tuple[int, int], np.ndarray] = {}
+        self._workers = []
+        self._commands = []
+        self._results = None
+        self._failure: Optional[str] = None
+
+    def initialize(self, initial_state: AtmosphericState) -> None:
+        """
+        Scatter the initial state into shared memory and start the workers.
+
+        Args:
+            initial_state (AtmosphericState): Initial conditions on the full grid
+        """
+        if self._workers:
+            self.close()
+        if initial_state.ensemble_size is not None:
+            raise ValueError("Ensemble states are not supported by the tiled driver")
+        # Same checks as the serial model, read-only so the caller's arrays stay untouched
+        validation = self.config.get('validation', {})
+        validator = StateValidator(bounds=validation.get('bounds'),
+                                   block_size=validation.get('block_size', 1 << 16))
+        failure = validator.check(SimpleNamespace(**{f: np.asarray(getattr(initial_state, f))
+                                                     for f in FIELDS}))
+        if failure is not None:
+            raise StateValidationError(failure)
+
+        shape = initial_state.temperature.shape
+        tiles = tuple(self.tiles or default_tiles(os.cpu_count() or 1, shape[0], shape[1]))
+        self.layout = decompose(shape, tiles)
+        self.dtype = np.result_type(*(getattr(initial_state, f) for f in FIELDS)).str
+        self.timestamp = initial_state.timestamp
+        self._failure = None
+
+        try:
+            for tile in self.layout:
+                nbytes = int(np.prod((len(FIELDS),) + tile.shape)) * np.dtype(self.dtype).itemsize
+                block = shared_memory.SharedMemory(create=True, size=nbytes)
+                self._blocks.append(block)
+                tile.shm_name = block.name
+                arrays = _tile_arrays(tile, block, self.dtype)
+                for k, name in enumerate(FIELDS):
+                    arrays[k] = getattr(initial_state, name)[tile.extended]
+                self._arrays[tile.index] = arrays
+
+            ctx = mp.get_context(self.start_method)
+            barrier = ctx.Barrier(len(self.layout))
+            self._results = ctx.Queue()
+            for tile in self.layout:
+                commands = ctx.Queue()
+                worker = ctx.Process(
+                    target=_tile_worker,
+                    args=(self.config, self.layout, tile.index, self.dtype,
+                          self.timestamp, barrier, commands, self._results),
+                    daemon=True
+                )
+                worker.start()
+                self._commands.append(commands)
+                self._workers.append(worker)
+        except Exception:
+            self.close()
+            raise
+
+        logger.info(f"Parallel domain initialized: {tiles[0]}x{tiles[1]} tiles "
+                    f"over {shape[0]}x{shape[1]}x{shape[2]}")
+
+    def run(self, dt: float, n_steps: int = 1) -> None:
+        """
+        Advance all tiles by n_steps time steps without gathering the state.
+
+        Args:
+            dt (float): Time step in seconds
+            n_steps (int): Number of steps to take
+        """
+        if not self._workers:
+            raise ValueError("Atmospheric state not initialized")
+        if self._failure:
+            # The barrier is broken and tiles may be at different steps
+            raise RuntimeError(f"Parallel driver unusable after a failed update "
+                               f"({self._failure}); initialize it again")
+        for commands in self._commands:
+            commands.put((dt, n_steps))
+        errors = []
+        for _ in self._workers:
+            index, error = self._results.get()
+            if error:
+                errors.append(f"tile {index}: {error}")
+        if errors:
+            self._failure = '; '.join(errors)
+            logger.error(f"Parallel update failed: {'; '.join(errors)}")
+            raise RuntimeError(f"Parallel update failed: {'; '.join(errors)}")
+        for _ in range(n_steps):
+            self.timestamp += timedelta(seconds=dt)
+
+    def update(self, dt: float) -> AtmosphericState:
+        """
+        Update atmospheric state for one time step.
+
+        Args:
+            dt (float): Time step in seconds
+
+        Returns:
+            AtmosphericState: Gathered atmospheric state
+        """
+        self.run(dt, 1)
+        return self.gather()
+
+    def gather(self) -> AtmosphericState:
+        """
+        Copy the tile interiors into a full-domain AtmosphericState.
+
+        Returns:
+            AtmosphericState: Current atmospheric state on the full grid
+        """
+        ny = self.layout[-1].y1
+        nx = self.layout[-1].x1
+        nz = self.layout[-1].nz
+        fields = {name: np.empty((ny, nx, nz), dtype=self.dtype) for name in FIELDS}
+        for tile in self.layout:
+            arrays = self._arrays[tile.index]
+            for k, name in enumerate(FIELDS):
+                fields[name][tile.y0:tile.y1, tile.x0:tile.x1] = arrays[k][tile.interior]
+        return AtmosphericState(**fields, timestamp=self.timestamp)
+
+    def get_output(self) -> Dict:
+        """
+        Prepare standardized output for the orchestrator.
+
+        Returns:
+            Dict: Current atmospheric state in standard format
+        """
+        state = self.gather()
+        output = {name: getattr(state, name) for name in FIELDS}
+        output['timestamp'] = state.timestamp
+        return output
+
+    def close(self) -> None:
+        """Stop the workers and release shared memory"""
+        for commands in self._commands:
+            commands.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+        self._workers = []
+        self._commands = []
+        self._arrays = {}
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main():
+    """Compare the parallel driver against the serial model"""
+    config = {
+        'spatial': {'nx': 100, 'ny': 100, 'nz': 30, 'dx': 10000, 'dy': 10000},
+        'temporal': {'dt': 300},
+        'parallel': {'tiles': [2, 2]}
+    }
+
+    def make_state():
+        # Smooth large-scale wave on a lapse-rate profile, advected by a steady
+        # wind well inside the CFL limit (u dt / dx = 0.15)
+        y, x, z = np.meshgrid(np.arange(100) / 100, np.arange(100) / 100, np.arange(30),
+                              indexing='ij')
+        wave = np.sin(2 * np.pi * x) * np.cos(2 * np.pi * y)
+        return AtmosphericState(
+            temperature=288 - 3.25 * z + 2 * wave,
+            pressure=1013.25 * np.exp(-500 * z / 8000) + 0.5 * wave,
+            wind_u=np.full((100, 100, 30), 5.0),
+            wind_v=np.full((100, 100, 30), 2.0),
+            humidity=np.ones((100, 100, 30)) * 0.01,
+            timestamp=datetime(2025, 2, 10)
+        )
+
+    serial = AtmosphericDynamics(config)
+    serial.initialize(make_state())
+    for _ in range(10):
+        serial.update(300)
+
+    with ParallelAtmosphericDynamics(config) as parallel:
+        parallel.initialize(make_state())
+        parallel.run(300, 10)
+        state = parallel.gather()
+
+    identical = all(np.array_equal(getattr(state, f), getattr(serial.state, f)) for f in FIELDS)
+    logger.info(f"Parallel run identical to serial: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Climate Model - Pressure Solvers
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Helmholtz solvers for the semi-implicit pressure/wind adjustment of the
+gridded atmospheric model. Each solves, independently on every level,
+
+    (I - a ∇²) p = rhs
+
+for fields laid out as (..., ny, nx, nz), with y on axis -3 and x on axis -2.
+
+- FFTHelmholtzSolver: exact direct solve on a doubly periodic domain, using
+  the Laplacian built from the same centred differences as periodic_gradient
+  and periodic_divergence, so the adjusted winds are consistent with it.
+- MultigridHelmholtzSolver: geometric multigrid V-cycles with a five-point
+  Laplacian and zero-gradient (Neumann) boundaries, for non-periodic domains.
+  The coarsest grid is solved exactly with a cached sparse LU factorisation.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+logger = logging.getLogger(__name__)
+
+Y_AXIS, X_AXIS = -3, -2
+
+
+def periodic_gradient(field: np.ndarray, spacing: float, axis: int) -> np.ndarray:
+    """Centred-difference derivative with periodic wrap-around"""
+    return (np.roll(field, -1, axis=axis) - np.roll(field, 1, axis=axis)) / (2 * spacing)
+
+
+def periodic_divergence(u: np.ndarray, v: np.ndarray, dx: float, dy: float) -> np.ndarray:
+    """Horizontal divergence matching periodic_gradient"""
+    return periodic_gradient(u, dx, X_AXIS) + periodic_gradient(v, dy, Y_AXIS)
+
+
+class FFTHelmholtzSolver:
+    """Direct FFT solver for (I - a ∇²) p = rhs on a doubly periodic grid"""
+
+    def __init__(self, ny: int, nx: int, dx: float, dy: float):
+        """
+        Precompute the spectral symbol of the centred-difference Laplacian.
+
+        Args:
+            ny, nx (int): Grid points along y and x
+            dx, dy (float): Grid spacing in metres
+        """
+        kx = 2 * np.pi * np.fft.rfftfreq(nx, d=dx)
+        ky = 2 * np.pi * np.fft.fftfreq(ny, d=dy)
+        # -∇² eigenvalues of div(grad) built from centred differences
+        self.symbol = ((np.sin(ky * dy) / dy) ** 2)[:, None] + ((np.sin(kx * dx) / dx) ** 2)[None, :]
+        self.shape = (ny, nx)
+
+    def solve(self, rhs: np.ndarray, a: float) -> np.ndarray:
+        """
+        Solve the Helmholtz problem on every level.
+
+        Args:
+            rhs (np.ndarray): Right-hand side, (..., ny, nx, nz)
+            a (float): Coefficient of the Laplacian term (>= 0)
+
+        Returns:
+            np.ndarray: Solution with the shape of rhs
+        """
+        if rhs.shape[Y_AXIS:X_AXIS + 1] != self.shape:
+            raise ValueError(f"Field shape {rhs.shape} does not match solver grid {self.shape}")
+        spectrum = np.fft.rfftn(rhs, axes=(Y_AXIS, X_AXIS))
+        spectrum /= (1 + a * self.symbol)[..., None]
+        return np.fft.irfftn(spectrum, s=self.shape, axes=(Y_AXIS, X_AXIS))
+
+
+class MultigridHelmholtzSolver:
+    """
+    Geometric multigrid solver for (I - a ∇²) p = rhs with Neumann boundaries.
+    Coarsens by 2x2 cell averaging while both horizontal extents stay even;
+    the coarsest grid is solved directly, so convergence does not depend on
+    how far the grid coarsens or on the size of a.
+    """
+
+    def __init__(self, dx: float, dy: float, tolerance: float = 1e-8, max_cycles: int = 30,
+                 smoothing_steps: int = 3, weight: float = 0.8):
+        """
+        Initialize the solver.
+
+        Args:
+            dx, dy (float): Fine-grid spacing in metres
+            tolerance (float): Relative residual at which V-cycles stop
+            max_cycles (int): Maximum number of V-cycles
+            smoothing_steps (int): Weighted-Jacobi sweeps before and after each correction
+            weight (float): Jacobi relaxation weight
+        """
+        self.dx = dx
+        self.dy = dy
+        self.tolerance = tolerance
+        self.max_cycles = max_cycles
+        self.smoothing_steps = smoothing_steps
+        self.weight = weight
+        self.cycles = 0
+        self._coarse = {}  # (ny, nx, a, h) -> LU factors of the coarsest operator
+
+    @staticmethod
+    def _pad(p: np.ndarray) -> np.ndarray:
+        """Edge-pad the horizontal axes, giving zero-gradient boundaries"""
+        width = [(0, 0)] * (p.ndim - 3) + [(1, 1), (1, 1), (0, 0)]
+        return np.pad(p, width, mode='edge')
+
+    def _apply(self, p: np.ndarray, a: float, h: Tuple[float, float]) -> np.ndarray:
+        """Apply (I - a ∇²) with the five-point Laplacian"""
+        hy, hx = h
+        q = self._pad(p)
+        laplacian = ((q[..., 2:, 1:-1, :] - 2 * p + q[..., :-2, 1:-1, :]) / hy ** 2 +
+                     (q[..., 1:-1, 2:, :] - 2 * p + q[..., 1:-1, :-2, :]) / hx ** 2)
+        return p - a * laplacian
+
+    def _coarse_solve(self, rhs: np.ndarray, a: float, h: Tuple[float, float]) -> np.ndarray:
+        """Exact solve on the coarsest grid"""
+        ny, nx = rhs.shape[Y_AXIS], rhs.shape[X_AXIS]
+        key = (ny, nx, a, h)
+        if key not in self._coarse:
+            def neumann(n, spacing):
+                # -d²/dx² with the zero-gradient boundaries of _pad
+                diagonal = np.full(n, 2.0)
+                diagonal[[0, -1]] = 1.0 if n > 1 else 0.0
+                return sparse.diags([-np.ones(n - 1), diagonal, -np.ones(n - 1)],
+                                    [-1, 0, 1]) / spacing ** 2
+            operator = (sparse.identity(ny * nx) +
+                        a * (sparse.kron(neumann(ny, h[0]), sparse.identity(nx)) +
+                             sparse.kron(sparse.identity(ny), neumann(nx, h[1]))))
+            self._coarse[key] = splu(operator.tocsc())
+        columns = np.moveaxis(rhs, (Y_AXIS, X_AXIS), (0, 1))
+        solution = self._coarse[key].solve(np.ascontiguousarray(columns.reshape(ny * nx, -1)))
+        return np.moveaxis(solution.reshape(columns.shape), (0, 1), (Y_AXIS, X_AXIS))
+
+    def _smooth(self, p: np.ndarray, rhs: np.ndarray, a: float,
+                h: Tuple[float, float], sweeps: int) -> np.ndarray:
+        """Weighted Jacobi sweeps"""
+        hy, hx = h
+        diagonal = 1 + a * (2 / hy ** 2 + 2 / hx ** 2)
+        for _ in range(sweeps):
+            p = p + self.weight * (rhs - self._apply(p, a, h)) / diagonal
+        return p
+
+    @staticmethod
+    def _restrict(r: np.ndarray) -> np.ndarray:
+        """Average 2x2 blocks of cells"""
+        return 0.25 * (r[..., 0::2, 0::2, :] + r[..., 1::2, 0::2, :] +
+                       r[..., 0::2, 1::2, :] + r[..., 1::2, 1::2, :])
+
+    @staticmethod
+    def _prolong(e: np.ndarray) -> np.ndarray:
+        """Inject each coarse cell into its 2x2 fine cells"""
+        return np.repeat(np.repeat(e, 2, axis=Y_AXIS), 2, axis=X_AXIS)
+
+    def _vcycle(self, p: np.ndarray, rhs: np.ndarray, a: float,
+                h: Tuple[float, float]) -> np.ndarray:
+        """One V-cycle"""
+        ny, nx = p.shape[Y_AXIS], p.shape[X_AXIS]
+        if ny % 2 or nx % 2 or min(ny, nx) < 4:
+            return self._coarse_solve(rhs, a, h)
+        p = self._smooth(p, rhs, a, h, self.smoothing_steps)
+        residual = self._restrict(rhs - self._apply(p, a, h))
+        correction = self._vcycle(np.zeros_like(residual), residual, a, (2 * h[0], 2 * h[1]))
+        p = p + self._prolong(correction)
+        return self._smooth(p, rhs, a, h, self.smoothing_steps)
+
+    def solve(self, rhs: np.ndarray, a: float, initial: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Solve the Helmholtz problem on every level.
+
+        Args:
+            rhs (np.ndarray): Right-hand side, (..., ny, nx, nz)
+            a (float): Coefficient of the Laplacian term (>= 0)
+            initial (np.ndarray): Starting guess (default: rhs)
+
+        Returns:
+            np.ndarray: Solution with the shape of rhs
+        """
+        h = (self.dy, self.dx)
+        p = rhs.copy() if initial is None else initial.copy()
+        norm = np.linalg.norm(rhs) or 1.0
+        for self.cycles in range(1, self.max_cycles + 1):
+            p = self._vcycle(p, rhs, a, h)
+            residual = np.linalg.norm(rhs - self._apply(p, a, h)) / norm
+            if residual < self.tolerance:
+                break
+        else:
+            logger.warning(f"Multigrid stopped after {self.max_cycles} cycles "
+                           f"with relative residual {residual:.2e}")
+        return p
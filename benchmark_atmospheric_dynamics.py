@@ -0,0 +1,231 @@
+"""
+Climate Model - Atmospheric Dynamics Benchmark
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Scaling benchmark for the gridded AtmosphericDynamics model (v10). Times
+compute_pressure_gradient, compute_temperature_advection, compute_tendencies
+(both together, the part spread over the thread pool) and a full update
+over a sweep of grid sizes and thread counts, and writes steps/s, achieved
+memory bandwidth and peak RSS to a JSON file that can be diffed across
+commits.
+
+Each case runs in a fresh spawned process so its peak RSS is its own.
+Bandwidth is a minimum-traffic estimate: the bytes of the arrays a kernel
+must read and write once, divided by its best time. It understates the
+traffic of kernels that create temporaries, which is exactly the overhead
+a JIT or fused backend would remove.
+
+Usage:
+    python benchmark_atmospheric_dynamics.py --sizes 64x64x16 128x128x32 \\
+        --threads 1 4 --steps 10 --output benchmark.json
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import multiprocessing
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Fields read plus fields written by each kernel, for the bandwidth estimate
+KERNEL_TRAFFIC = {
+    'pressure_gradient': 1 + 2,      # pressure -> dpx, dpy
+    'temperature_advection': 3 + 1,  # temperature, wind_u, wind_v -> advection
+    'tendencies': 4 + 3,             # pressure, temperature, winds -> dpx, dpy, advection
+    'update': 4 + 3                  # pressure, temperature, winds -> winds, temperature
+}
+
+
+def parse_size(text: str) -> Tuple[int, int, int]:
+    """Parse an 'NXxNYxNZ' grid size"""
+    try:
+        nx, ny, nz = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Grid size must look like 128x128x32, got '{text}'")
+    return nx, ny, nz
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB, if measurable"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+def time_call(func, repeat: int) -> List[float]:
+    """Wall-clock seconds of `repeat` calls to func"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_case(case: Dict) -> Dict:
+    """
+    Benchmark one grid size and thread count. Runs in a child process.
+
+    Args:
+        case (Dict): nx, ny, nz, threads, precision, pressure_solver, steps, repeat, dt
+
+    Returns:
+        Dict: Timings, bandwidth and peak RSS for the case
+    """
+    from atmospheric_dynamics_v10 import AtmosphericDynamics, AtmosphericState
+    logging.getLogger('atmospheric_dynamics_v10').setLevel(logging.WARNING)
+
+    nx, ny, nz = case['nx'], case['ny'], case['nz']
+    config = {
+        'spatial': {'nx': nx, 'ny': ny, 'nz': nz, 'dx': 1000, 'dy': 1000},
+        'temporal': {'dt': case['dt']},
+        'numerics': {'precision': case['precision'], 'threads': case['threads'],
+                     'pressure_solver': case['pressure_solver']},
+        'validation': {'interval': 0}
+    }
+    model = AtmosphericDynamics(config)
+
+    # Smooth, weak perturbations keep the state well-behaved over the timed steps
+    y, x = np.meshgrid(np.linspace(0, 2 * np.pi, ny, endpoint=False),
+                       np.linspace(0, 2 * np.pi, nx, endpoint=False), indexing='ij')
+    wave = np.repeat((np.sin(x) * np.cos(y))[..., None], nz, axis=2)
+    model.initialize(AtmosphericState(
+        temperature=288 + wave,
+        pressure=1013.25 + 0.1 * wave,
+        wind_u=np.full((ny, nx, nz), 5.0),
+        wind_v=np.full((ny, nx, nz), -2.0),
+        humidity=np.full((ny, nx, nz), 0.01),
+        timestamp=datetime(2025, 1, 1)
+    ))
+
+    field_bytes = model.state.temperature.nbytes
+    kernels = {
+        'pressure_gradient': model.compute_pressure_gradient,
+        'temperature_advection': model.compute_temperature_advection,
+        'tendencies': model.compute_tendencies,
+        'update': lambda: model.update(case['dt'])
+    }
+    result = dict(case, kernels={})
+    try:
+        for name, func in kernels.items():
+            func()  # Warm-up
+            repeat = case['steps'] if name == 'update' else case['repeat']
+            times = time_call(func, repeat)
+            best = min(times)
+            result['kernels'][name] = {
+                'seconds_best': best,
+                'seconds_median': float(np.median(times)),
+                'calls_per_s': 1.0 / best,
+                'bandwidth_gbs': KERNEL_TRAFFIC[name] * field_bytes / best / 1e9
+            }
+    finally:
+        model.close()
+
+    result['steps_per_s'] = 1.0 / result['kernels']['update']['seconds_median']
+    result['peak_rss_mb'] = peak_rss_mb()
+    result['state_mb'] = model.state.nbytes / 2 ** 20
+    return result
+
+
+def environment() -> Dict:
+    """Machine and code metadata stored with the results"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': multiprocessing.cpu_count()
+    }
+
+
+def run_benchmark(sizes: List[Tuple[int, int, int]], threads: List[int], steps: int = 10,
+                  repeat: int = 5, precision: str = 'float64',
+                  pressure_solver: str = 'explicit', dt: float = 1.0) -> Dict:
+    """
+    Run the full sweep, one spawned process per case.
+
+    Args:
+        sizes (List[Tuple[int, int, int]]): (nx, ny, nz) grid sizes
+        threads (List[int]): Tendency thread counts
+        steps (int): Timed model updates per case
+        repeat (int): Timed calls per individual kernel
+        precision (str): v10 precision mode
+        pressure_solver (str): v10 pressure solver
+        dt (float): Model time step of the timed updates (seconds)
+
+    Returns:
+        Dict: 'environment' metadata and one 'results' entry per case
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for nx, ny, nz in sizes:
+        for n_threads in threads:
+            case = {'nx': nx, 'ny': ny, 'nz': nz, 'threads': n_threads,
+                    'precision': precision, 'pressure_solver': pressure_solver,
+                    'steps': steps, 'repeat': repeat, 'dt': dt}
+            with context.Pool(1) as pool:
+                result = pool.apply(run_case, (case,))
+            logger.info(f"{nx}x{ny}x{nz}, {n_threads} thread(s): "
+                        f"{result['steps_per_s']:.2f} steps/s, "
+                        f"update {result['kernels']['update']['bandwidth_gbs']:.2f} GB/s, "
+                        f"peak RSS {result['peak_rss_mb'] or float('nan'):.1f} MiB")
+            results.append(result)
+    return {'environment': environment(), 'results': results}
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the v10 atmospheric dynamics kernels")
+    parser.add_argument('--sizes', nargs='+', type=parse_size,
+                        default=[(64, 64, 16), (128, 128, 32), (256, 256, 32)],
+                        help="Grid sizes as NXxNYxNZ")
+    parser.add_argument('--threads', nargs='+', type=int, default=[1, 2, 4],
+                        help="Tendency thread counts")
+    parser.add_argument('--steps', type=int, default=10, help="Timed updates per case")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed calls per kernel")
+    parser.add_argument('--precision', default='float64',
+                        choices=['float64', 'float32', 'mixed'])
+    parser.add_argument('--pressure-solver', default='explicit',
+                        choices=['explicit', 'fft', 'multigrid'])
+    parser.add_argument('--dt', type=float, default=1.0, help="Time step of the timed updates")
+    parser.add_argument('--output', default='benchmark_atmospheric_dynamics.json',
+                        help="JSON results file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = run_benchmark(args.sizes, args.threads, args.steps, args.repeat,
+                           args.precision, args.pressure_solver, args.dt)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Climate Model - Coupling Orchestrator
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Central orchestration of data flow between climate model modules. Modules
+register with their own time step and the fields they provide; couplings
+route a provided field to another module's receive_input. Every exchange
+hands over read-only views of the producer's live arrays, so no field is
+ever copied or serialized, and a consumer cannot modify a producer's state.
+
+Module interface (as in atmospheric_dynamics_v10.AtmosphericDynamics):
+    update(dt)            advance one module time step
+    get_output() -> Dict  current fields, by reference
+    receive_input(data)   accept coupled fields, by reference
+
+Because fields are shared rather than copied, a consumer sees the producer's
+current values; a module that needs a frozen copy must take it itself.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def readonly_view(array: np.ndarray) -> np.ndarray:
+    """Return a non-writeable view sharing memory with `array`"""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+@dataclass
+class RegisteredModule:
+    """A module taking part in the coupled run"""
+    name: str
+    module: Any
+    dt: float
+    provides: Tuple[str, ...]
+    time: float = 0.0
+    steps: int = 0
+
+
+@dataclass
+class Coupling:
+    """Route of one field from a producer to a consumer"""
+    source: str
+    field: str
+    target: str
+    target_field: str
+    transform: Optional[Callable[[np.ndarray], np.ndarray]] = None
+
+
+class ClimateOrchestrator:
+    """
+    Steps registered modules to each coupling time, then exchanges fields
+    between them as shared read-only views.
+    """
+
+    def __init__(self, coupling_interval: float):
+        """
+        Initialize the orchestrator.
+
+        Args:
+            coupling_interval (float): Model seconds between field exchanges
+        """
+        if coupling_interval <= 0:
+            raise ValueError("Coupling interval must be positive")
+        self.coupling_interval = coupling_interval
+        self.modules: Dict[str, RegisteredModule] = {}
+        self.couplings: List[Coupling] = []
+        self.time = 0.0
+
+    def register(self, name: str, module: Any, dt: float, provides: Tuple[str, ...] = ()) -> None:
+        """
+        Register a module.
+
+        Args:
+            name (str): Unique module name
+            module: Object implementing update/get_output/receive_input
+            dt (float): Module time step in seconds; must divide the coupling interval
+            provides (Tuple[str, ...]): Output fields other modules may couple to
+        """
+        if name in self.modules:
+            raise ValueError(f"Module '{name}' already registered")
+        if dt <= 0:
+            raise ValueError(f"Time step of '{name}' must be positive, got {dt}s")
+        steps = self.coupling_interval / dt
+        if abs(steps - round(steps)) > 1e-9 * steps:
+            raise ValueError(f"Time step {dt}s of '{name}' does not divide "
+                             f"the coupling interval {self.coupling_interval}s")
+        self.modules[name] = RegisteredModule(name, module, dt, tuple(provides), self.time)
+        logger.info(f"Registered module '{name}' (dt={dt}s, provides {list(provides)})")
+
+    def couple(self, source: str, field: str, target: str, target_field: Optional[str] = None,
+               transform: Optional[Callable[[np.ndarray], np.ndarray]] = None) -> None:
+        """
+        Route a field from one module to another.
+
+        Args:
+            source (str): Producing module
+            field (str): Field name in the producer's output
+            target (str): Consuming module
+            target_field (str): Key under which the consumer receives it (default: field)
+            transform (Callable): Optional view-producing selection, e.g. a level slice;
+                                  it must not copy if the exchange is to stay zero-copy
+        """
+        if source not in self.modules or target not in self.modules:
+            raise ValueError(f"Unknown module in coupling {source} -> {target}")
+        if field not in self.modules[source].provides:
+            raise ValueError(f"Module '{source}' does not provide '{field}'")
+        self.couplings.append(Coupling(source, field, target, target_field or field, transform))
+
+    def exchange(self) -> None:
+        """Hand every coupled field to its consumer as a read-only view"""
+        outputs = {}
+        inputs: Dict[str, Dict[str, np.ndarray]] = {}
+        for coupling in self.couplings:
+            if coupling.source not in outputs:
+                outputs[coupling.source] = self.modules[coupling.source].module.get_output()
+            data = outputs[coupling.source][coupling.field]
+            if coupling.transform is not None:
+                data = coupling.transform(data)
+            inputs.setdefault(coupling.target, {})[coupling.target_field] = readonly_view(data)
+        for target, data in inputs.items():
+            self.modules[target].module.receive_input(data)
+
+    def step(self) -> None:
+        """Exchange fields, then advance every module by one coupling interval"""
+        self.exchange()
+        end = self.time + self.coupling_interval
+        for entry in self.modules.values():
+            for _ in range(int(round((end - entry.time) / entry.dt))):
+                entry.module.update(entry.dt)
+                entry.steps += 1
+            entry.time = end
+        self.time = end
+
+    def run(self, duration: float) -> None:
+        """
+        Run the coupled system.
+
+        Args:
+            duration (float): Model seconds to simulate (rounded up to whole intervals)
+        """
+        n_intervals = int(np.ceil(duration / self.coupling_interval - 1e-9))
+        logger.info(f"Coupled run: {n_intervals} intervals of {self.coupling_interval}s "
+                    f"across {len(self.modules)} modules")
+        for _ in range(n_intervals):
+            self.step()
+
+
+@dataclass
+class SlabSurface:
+    """
+    Minimal slab surface module: its temperature relaxes towards the air
+    temperature it receives. Reference implementation of the module interface.
+    """
+    temperature: np.ndarray             # Surface temperature (K), (ny, nx)
+    relaxation_time: float = 86400.0    # Seconds
+    air_temperature: Optional[np.ndarray] = field(default=None, repr=False)
+
+    def update(self, dt: float) -> None:
+        """Relax the surface towards the coupled air temperature"""
+        if self.air_temperature is not None:
+            self.temperature += (self.air_temperature - self.temperature) * dt / self.relaxation_time
+
+    def get_output(self) -> Dict:
+        """Surface fields, by reference"""
+        return {'surface_temperature': self.temperature}
+
+    def receive_input(self, data: Dict) -> None:
+        """Keep a reference to the coupled air temperature"""
+        if 'air_temperature' in data:
+            self.air_temperature = data['air_temperature']
+
+
+def main():
+    """Coupled atmosphere-surface test run"""
+    from datetime import datetime
+    from atmospheric_dynamics_v10 import AtmosphericDynamics, AtmosphericState
+
+    config = {
+        'spatial': {'nx': 100, 'ny': 100, 'nz': 30, 'dx': 1000, 'dy': 1000},
+        'temporal': {'dt': 300}
+    }
+    atm = AtmosphericDynamics(config)
+    atm.initialize(AtmosphericState(
+        temperature=np.ones((100, 100, 30)) * 288,
+        pressure=np.ones((100, 100, 30)) * 1013.25,
+        wind_u=np.zeros((100, 100, 30)),
+        wind_v=np.zeros((100, 100, 30)),
+        humidity=np.ones((100, 100, 30)) * 0.01,
+        timestamp=datetime.now()
+    ))
+    surface = SlabSurface(temperature=np.full((100, 100), 295.0))
+
+    orchestrator = ClimateOrchestrator(coupling_interval=3600)
+    orchestrator.register('atmosphere', atm, dt=300, provides=('temperature',))
+    orchestrator.register('surface', surface, dt=1800, provides=('surface_temperature',))
+    orchestrator.couple('surface', 'surface_temperature', 'atmosphere')
+    orchestrator.couple('atmosphere', 'temperature', 'surface', 'air_temperature',
+                        transform=lambda t: t[..., 0])
+    orchestrator.run(6 * 3600)
+
+    logger.info(f"Shared, not copied: {np.shares_memory(surface.air_temperature, atm.state.temperature)}")
+    logger.info(f"Lowest-level mean temperature: {atm.state.temperature[..., 0].mean():.2f} K")
+
+
+if __name__ == "__main__":
+    main()
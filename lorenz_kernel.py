@@ -0,0 +1,81 @@
+"""
+Lorenz Integration Kernel
+Author: CossackNikolay
+Created: 2026-10-18
+
+Vectorized fixed-step RK4 for batches of Lorenz states, shared by
+AtmosphericSystem (atmospheric_dynamics_V4.py) and the parameter sweep
+(lorenz_sweep.py). Kept free of database, plotting and logging setup so
+sweep worker processes import only NumPy.
+"""
+
+import numpy as np
+
+
+def lorenz_rhs(states, out, sigma, rho, beta):
+    """
+    Vectorized Lorenz equations.
+
+    Args:
+        states (np.ndarray): Component-major states, shape (3, N)
+        out (np.ndarray): Preallocated derivatives, shape (3, N)
+        sigma, rho, beta (float or np.ndarray): Parameters, scalars or one per state
+
+    Returns:
+        np.ndarray: out
+    """
+    x, y, z = states
+    np.subtract(y, x, out=out[0])
+    out[0] *= sigma
+    np.subtract(rho, z, out=out[1])
+    out[1] *= x
+    out[1] -= y
+    np.multiply(x, y, out=out[2])
+    out[2] -= beta * z
+    return out
+
+
+def integrate_lorenz(initial_states, t, sigma, rho, beta, max_step=0.0025):
+    """
+    Advance many Lorenz states at once with fixed-step RK4.
+
+    Each output interval is split into equal substeps of at most max_step
+    model units.
+
+    Args:
+        initial_states (np.ndarray): Initial states, shape (N, 3)
+        t (np.ndarray): Output times in model units, increasing, t[0] = start
+        sigma, rho, beta (float or np.ndarray): Parameters, scalars or one per state
+        max_step (float): Largest RK4 substep in model units
+
+    Returns:
+        np.ndarray: Trajectories, shape (len(t), N, 3)
+    """
+    state = np.array(initial_states, dtype=float).reshape(-1, 3).T.copy()
+    solution = np.empty((len(t),) + state.shape[::-1])
+    solution[0] = state.T
+    k1, k2, k3, k4, stage = (np.empty_like(state) for _ in range(5))
+
+    for i in range(1, len(t)):
+        interval = t[i] - t[i - 1]
+        n_sub = max(1, int(np.ceil(interval / max_step - 1e-9)))
+        h = interval / n_sub
+        for _ in range(n_sub):
+            lorenz_rhs(state, k1, sigma, rho, beta)
+            np.multiply(k1, h / 2, out=stage)
+            stage += state
+            lorenz_rhs(stage, k2, sigma, rho, beta)
+            np.multiply(k2, h / 2, out=stage)
+            stage += state
+            lorenz_rhs(stage, k3, sigma, rho, beta)
+            np.multiply(k3, h, out=stage)
+            stage += state
+            lorenz_rhs(stage, k4, sigma, rho, beta)
+            k2 += k3
+            k2 *= 2
+            k1 += k2
+            k1 += k4
+            k1 *= h / 6
+            state += k1
+        solution[i] = state.T
+    return solution
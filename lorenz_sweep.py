@@ -0,0 +1,199 @@
+"""
+Lorenz Parameter Sweep
+Author: CossackNikolay
+Created: 2026-10-18
+
+Scans grids of the Lorenz parameters (sigma, rho) over several initial
+states to study regime changes of the toy model in AtmosphericSystem
+(atmospheric_dynamics_V4.py), using the same RK4 kernel (lorenz_kernel.py).
+Jobs are split into chunks spread across a ProcessPoolExecutor; each worker
+integrates its whole chunk as one vectorized batch and returns only the
+summary diagnostics:
+
+- largest Lyapunov exponent, estimated from the growth of a renormalized
+  perturbation (Benettin's method)
+- attractor bounds, the min/max of x, y and z after the transient
+
+The sweep table is then written to lorenz_sweep in one bulk insert.
+
+Usage:
+    python lorenz_sweep.py --sigma 5 15 20 --rho 0 50 100 --initial-states 5 --store
+"""
+
+import os
+import csv
+import uuid
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lorenz_kernel import integrate_lorenz
+
+RESULT_COLUMNS = ('sigma', 'rho', 'beta', 'x0', 'y0', 'z0', 'lyapunov',
+                  'x_min', 'x_max', 'y_min', 'y_max', 'z_min', 'z_max')
+
+
+def sweep_chunk(jobs, transient=10.0, duration=50.0, interval=0.5, samples=10,
+                separation=1e-8, max_step=0.0025):
+    """
+    Integrate one chunk of sweep jobs and summarize each. Runs in a worker.
+
+    Args:
+        jobs (np.ndarray): Rows of (sigma, rho, beta, x0, y0, z0), shape (N, 6)
+        transient (float): Model time discarded before measuring
+        duration (float): Model time over which diagnostics are measured
+        interval (float): Model time between perturbation renormalizations
+        samples (int): Trajectory samples per interval for the bounds
+        separation (float): Size of the renormalized perturbation
+        max_step (float): RK4 step limit
+
+    Returns:
+        np.ndarray: Rows of RESULT_COLUMNS, shape (N, 13)
+    """
+    n = len(jobs)
+    # Per-job parameters broadcast against the (3, 2N) component-major states
+    params = tuple(np.tile(jobs[:, i], 2) for i in range(3)) + (max_step,)
+
+    state = integrate_lorenz(np.vstack([jobs[:, 3:], jobs[:, 3:]]),
+                             np.array([0.0, transient]), *params)[-1]
+    state[n:, 0] += separation
+
+    t = np.linspace(0.0, interval, samples + 1)
+    log_growth = np.zeros(n)
+    lower = np.full((n, 3), np.inf)
+    upper = np.full((n, 3), -np.inf)
+    for _ in range(int(round(duration / interval))):
+        trajectory = integrate_lorenz(state, t, *params)
+        lower = np.minimum(lower, trajectory[:, :n].min(axis=0))
+        upper = np.maximum(upper, trajectory[:, :n].max(axis=0))
+
+        state = trajectory[-1]
+        offset = state[n:] - state[:n]
+        distance = np.linalg.norm(offset, axis=1)
+        log_growth += np.log(distance / separation)
+        # Pull the perturbed copy back to the reference separation
+        scale = np.divide(separation, distance, out=np.ones(n), where=distance > 0)
+        state[n:] = state[:n] + offset * scale[:, None]
+
+    lyapunov = log_growth / duration
+    bounds = np.stack([lower, upper], axis=-1).reshape(n, 6)
+    return np.column_stack([jobs, lyapunov, bounds])
+
+
+def build_jobs(sigmas, rhos, beta, initial_states):
+    """Every (sigma, rho) pair combined with every initial state"""
+    sigma, rho = (g.ravel() for g in np.meshgrid(sigmas, rhos, indexing='ij'))
+    params = np.column_stack([sigma, rho, np.full(sigma.size, beta)])
+    params = np.repeat(params, len(initial_states), axis=0)
+    states = np.tile(initial_states, (len(sigma), 1))
+    return np.column_stack([params, states])
+
+
+def run_sweep(jobs, workers=None, chunk_size=256, **options):
+    """
+    Spread sweep jobs across a process pool.
+
+    Args:
+        jobs (np.ndarray): Rows of (sigma, rho, beta, x0, y0, z0)
+        workers (int): Worker processes (default: all cores)
+        chunk_size (int): Jobs integrated together per task
+        **options: Passed to sweep_chunk
+
+    Returns:
+        np.ndarray: Rows of RESULT_COLUMNS in job order
+
+    Raises:
+        ValueError: If there are no jobs
+    """
+    if len(jobs) == 0:
+        raise ValueError("Empty parameter grid: the sweep has no jobs")
+    chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+    workers = workers or os.cpu_count()
+    logging.info(f"Sweeping {len(jobs)} jobs in {len(chunks)} chunks on {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(sweep_chunk, chunk, **options) for chunk in chunks]
+        results = [future.result() for future in futures]
+    return np.vstack(results)
+
+
+def store_sweep(results, db_params=None):
+    """
+    Write the sweep table in one bulk insert.
+
+    Args:
+        results (np.ndarray): Rows of RESULT_COLUMNS
+        db_params (dict): psycopg2 connection parameters (default: V4 DB_CONFIG)
+
+    Returns:
+        str: Sweep id of the stored rows
+    """
+    # Imported here so worker processes never load the database stack
+    import psycopg2
+    from psycopg2.extras import execute_values
+    if db_params is None:
+        from atmospheric_dynamics_V4 import DB_CONFIG
+        db_params = DB_CONFIG
+
+    sweep_id = str(uuid.uuid4())
+    rows = [(sweep_id, *row) for row in results.tolist()]
+    conn = psycopg2.connect(**db_params)
+    try:
+        cursor = conn.cursor()
+        execute_values(cursor, f"""
+            INSERT INTO lorenz_sweep (sweep_id, {', '.join(RESULT_COLUMNS)})
+            VALUES %s
+        """, rows, page_size=1000)
+        conn.commit()
+        logging.info(f"Stored sweep {sweep_id} ({len(rows)} rows)")
+        return sweep_id
+    except Exception as e:
+        logging.error(f"Failed to store sweep: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Lorenz (sigma, rho) parameter sweep")
+    parser.add_argument('--sigma', nargs=3, type=float, default=[10.0, 10.0, 1],
+                        metavar=('START', 'STOP', 'NUM'), help="sigma grid (linspace)")
+    parser.add_argument('--rho', nargs=3, type=float, default=[0.0, 50.0, 51],
+                        metavar=('START', 'STOP', 'NUM'), help="rho grid (linspace)")
+    parser.add_argument('--beta', type=float, default=8.0 / 3)
+    parser.add_argument('--initial-states', type=int, default=4,
+                        help="Random initial states per parameter set")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--duration', type=float, default=50.0,
+                        help="Model time over which diagnostics are measured")
+    parser.add_argument('--csv', help="Also write the sweep table to this CSV file")
+    parser.add_argument('--store', action='store_true', help="Write the sweep table to lorenz_sweep")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    rng = np.random.default_rng(args.seed)
+    initial_states = rng.normal([0.0, 0.0, 25.0], [8.0, 8.0, 8.0], (args.initial_states, 3))
+    sigmas = np.linspace(args.sigma[0], args.sigma[1], int(args.sigma[2]))
+    rhos = np.linspace(args.rho[0], args.rho[1], int(args.rho[2]))
+    jobs = build_jobs(sigmas, rhos, args.beta, initial_states)
+
+    results = run_sweep(jobs, args.workers, args.chunk_size, duration=args.duration)
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(RESULT_COLUMNS)
+            writer.writerows(results.tolist())
+    if args.store:
+        store_sweep(results)
+    chaotic = results[:, RESULT_COLUMNS.index('lyapunov')] > 0.01
+    logging.info(f"Sweep complete: {chaotic.sum()} of {len(results)} runs chaotic")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+-- Lorenz simulation trajectories written by AtmosphericSystem (atmospheric_dynamics_V4.py)
+
+-- Row mode: one row per output time, bulk-loaded with COPY
+CREATE TABLE IF NOT EXISTS simulation_results (
+    id SERIAL PRIMARY KEY,
+    run_id UUID,
+    location VARCHAR(100),
+    timestamp TIMESTAMP NOT NULL,
+    x_value FLOAT,
+    y_value FLOAT,
+    z_value FLOAT
+);
+
+-- Tables created before run tagging
+ALTER TABLE simulation_results ADD COLUMN IF NOT EXISTS run_id UUID;
+ALTER TABLE simulation_results ADD COLUMN IF NOT EXISTS location VARCHAR(100);
+
+-- Compact mode: one row per run and location, the trajectory packed as
+-- little-endian float32 (n_points x 3: x, y, z) at start_time + i * step_seconds
+CREATE TABLE IF NOT EXISTS simulation_trajectories (
+    run_id UUID NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    start_time TIMESTAMP NOT NULL,
+    step_seconds FLOAT NOT NULL,
+    n_points INTEGER NOT NULL,
+    trajectory BYTEA NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (run_id, location)
+);
+
+CREATE INDEX IF NOT EXISTS idx_simulation_run ON simulation_results(run_id);
+CREATE INDEX IF NOT EXISTS idx_simulation_location_time ON simulation_results(location, timestamp);
+CREATE INDEX IF NOT EXISTS idx_trajectory_location_time ON simulation_trajectories(location, start_time);
+
+-- Last integrated Lorenz state per location, from which each monitoring
+-- cycle continues the trajectory
+CREATE TABLE IF NOT EXISTS lorenz_state (
+    location VARCHAR(100) PRIMARY KEY,
+    valid_time TIMESTAMP NOT NULL,
+    x_value FLOAT NOT NULL,
+    y_value FLOAT NOT NULL,
+    z_value FLOAT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Percentile bands of perturbed-initial-condition ensembles; members
+-- themselves are never stored
+CREATE TABLE IF NOT EXISTS ensemble_bands (
+    run_id UUID NOT NULL,
+    location VARCHAR(100) NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    variable CHAR(1) NOT NULL,
+    percentile FLOAT NOT NULL,
+    value FLOAT,
+    n_members INTEGER NOT NULL,
+    PRIMARY KEY (run_id, location, timestamp, variable, percentile)
+);
+
+CREATE INDEX IF NOT EXISTS idx_bands_location_time ON ensemble_bands(location, timestamp);
+
+-- Lorenz parameter sweeps (lorenz_sweep.py): one row per
+-- (parameter set, initial state) with its summary diagnostics
+CREATE TABLE IF NOT EXISTS lorenz_sweep (
+    sweep_id UUID NOT NULL,
+    sigma FLOAT NOT NULL,
+    rho FLOAT NOT NULL,
+    beta FLOAT NOT NULL,
+    x0 FLOAT NOT NULL,
+    y0 FLOAT NOT NULL,
+    z0 FLOAT NOT NULL,
+    lyapunov FLOAT,
+    x_min FLOAT,
+    x_max FLOAT,
+    y_min FLOAT,
+    y_max FLOAT,
+    z_min FLOAT,
+    z_max FLOAT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_sweep_id ON lorenz_sweep(sweep_id);
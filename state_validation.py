@@ -0,0 +1,148 @@
+"""
+Climate Model - State Validation
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Cheap detection of blown-up model states. A run that goes unstable fails
+through NaN or Inf long before temperatures turn negative, so every field is
+checked for finiteness as well as for physical bounds.
+
+Each field is scanned once, in cache-sized blocks: the block minimum and
+maximum are reduced while the block is still in cache, and since NaN
+propagates through both reductions and Inf shows up as an extreme, one
+min/max pair per block covers finiteness and bounds together. Only a failing
+block is searched again to locate the first offending cell. Validation runs
+at a configurable step cadence rather than on every step.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Physical bounds per field (inclusive); fields not listed are only checked for finiteness
+DEFAULT_BOUNDS = {
+    'temperature': (0.0, np.inf),   # K
+    'pressure': (0.0, np.inf)       # hPa
+}
+
+FIELDS = ('temperature', 'pressure', 'wind_u', 'wind_v', 'humidity')
+
+
+@dataclass
+class ValidationFailure:
+    """First offending cell found in a state"""
+    step: int
+    field: str
+    index: Tuple[int, ...]
+    value: float
+    reason: str
+
+    def __str__(self) -> str:
+        return (f"{self.reason} in {self.field} at cell {self.index} "
+                f"(value {self.value}) on step {self.step}")
+
+
+class StateValidationError(ValueError):
+    """Raised when a state fails validation; carries the failure record"""
+
+    def __init__(self, failure: ValidationFailure, rolled_back: bool = False):
+        message = str(failure)
+        if rolled_back:
+            message += "; state rolled back to the last checkpoint"
+        super().__init__(message)
+        self.failure = failure
+        self.rolled_back = rolled_back
+
+
+class StateValidator:
+    """
+    Blocked min/max/finite checks of the gridded state fields.
+    """
+
+    def __init__(self, interval: int = 10, bounds: Optional[Dict[str, Tuple[float, float]]] = None,
+                 block_size: int = 1 << 16):
+        """
+        Initialize the validator.
+
+        Args:
+            interval (int): Validate every `interval` model steps (0 disables
+                            the periodic check; explicit calls still run)
+            bounds (Dict[str, Tuple[float, float]]): Inclusive (low, high) per
+                                                      field, merged over DEFAULT_BOUNDS
+            block_size (int): Elements reduced per block
+        """
+        if interval < 0:
+            raise ValueError("Validation interval must not be negative")
+        self.interval = interval
+        self.bounds = dict(DEFAULT_BOUNDS, **(bounds or {}))
+        self.block_size = block_size
+        self.last_failure: Optional[ValidationFailure] = None
+
+    def due(self, step: int) -> bool:
+        """Whether the periodic check falls on `step`"""
+        return self.interval > 0 and step % self.interval == 0
+
+    def check_field(self, name: str, data: np.ndarray, step: int = 0) -> Optional[ValidationFailure]:
+        """
+        Check one field block by block.
+
+        Each block costs two reductions, min then max; the second reads the
+        block from cache, so the field is streamed from memory once. NaN
+        propagates through both and Inf is an extreme, so no separate
+        finiteness scan is needed; only a failing block is scanned again.
+
+        Args:
+            name (str): Field name, used to look up its bounds
+            data (np.ndarray): Field values
+            step (int): Model step, recorded in the failure
+
+        Returns:
+            Optional[ValidationFailure]: First offending cell, or None if valid
+        """
+        low, high = self.bounds.get(name, (-np.inf, np.inf))
+        flat = data.reshape(-1)
+        for start in range(0, flat.size, self.block_size):
+            block = flat[start:start + self.block_size]
+            block_min, block_max = block.min(), block.max()
+            if np.isfinite(block_min) and np.isfinite(block_max) and \
+                    block_min >= low and block_max <= high:
+                continue
+
+            bad = ~np.isfinite(block) | (block < low) | (block > high)
+            offset = int(np.argmax(bad))
+            value = float(block[offset])
+            if np.isnan(value):
+                reason = "NaN"
+            elif np.isinf(value):
+                reason = "Inf"
+            elif value < low:
+                reason = f"Value below {low}"
+            else:
+                reason = f"Value above {high}"
+            index = tuple(int(i) for i in np.unravel_index(start + offset, data.shape))
+            return ValidationFailure(step, name, index, value, reason)
+        return None
+
+    def check(self, state, step: int = 0) -> Optional[ValidationFailure]:
+        """
+        Check every field of a state.
+
+        Args:
+            state (AtmosphericState): State to check
+            step (int): Model step, recorded in the failure
+
+        Returns:
+            Optional[ValidationFailure]: First failure found, or None if valid
+        """
+        for name in FIELDS:
+            failure = self.check_field(name, getattr(state, name), step)
+            if failure is not None:
+                self.last_failure = failure
+                logger.error(f"State validation failed: {failure}")
+                return failure
+        return None
@@ -0,0 +1,421 @@
+"""
+Climate Model - Station/Grid Interpolation
+Last Updated: 2026-10-18
+Lead: CossackNikolay
+
+Module Purpose:
+Connects the gridded AtmosphericDynamics model (v10) with the station tables
+used by the monitoring system (atmospheric_state in v16, weather_data).
+
+StationSampler precomputes bilinear or nearest-neighbour weights from station
+latitude/longitude to grid cells once, as a sparse matrix. Each output step
+then extracts every station value with one sparse-dense product per field and
+bulk-writes the rows to atmospheric_state next to the observations.
+
+ObjectiveAnalysis goes the other way: it spreads the latest observations onto
+the grid by Barnes or inverse-distance weighting, with a k-d tree limiting
+each cell to nearby stations, to cold-start the model from real data.
+
+Grid geolocation (additional keys in the 'spatial' config section):
+    'lat0', 'lon0'   latitude/longitude of cell [0, 0]; y (axis 0) points
+                     north in steps of dy metres, x (axis 1) east in steps of dx
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.spatial import cKDTree
+from psycopg2.extras import execute_values
+
+from atmospheric_dynamics_v10 import AtmosphericState, STATE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS = 6371000.0  # Mean Earth radius (m)
+LAPSE_RATE = 0.0065       # Standard atmosphere lapse rate (K/m)
+SCALE_HEIGHT = 8000.0     # Pressure scale height (m)
+
+
+def station_arrays(stations: Sequence) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Split stations into names, latitudes and longitudes.
+
+    Accepts WeatherStation objects (v16) or location dicts with
+    'name'/'latitude'/'longitude' (V4) or 'name'/'lat'/'lon' (weather_integration).
+    """
+    names, lats, lons = [], [], []
+    for station in stations:
+        if isinstance(station, dict):
+            names.append(station['name'])
+            lats.append(station.get('latitude', station.get('lat')))
+            lons.append(station.get('longitude', station.get('lon')))
+        else:
+            names.append(station.name)
+            lats.append(station.latitude)
+            lons.append(station.longitude)
+    return names, np.asarray(lats, dtype=np.float64), np.asarray(lons, dtype=np.float64)
+
+
+def grid_coordinates(config: Dict, latitude: np.ndarray,
+                     longitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert latitude/longitude to fractional grid indices.
+
+    Uses a local equirectangular projection about the grid origin, which is
+    accurate for the regional domains the model runs on.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Fractional (y, x) indices
+    """
+    spatial = config['spatial']
+    lat0, lon0 = spatial['lat0'], spatial['lon0']
+    dlon = (np.asarray(longitude) - lon0 + 180.0) % 360.0 - 180.0
+    y = np.radians(np.asarray(latitude) - lat0) * EARTH_RADIUS / spatial['dy']
+    x = np.radians(dlon) * EARTH_RADIUS * np.cos(np.radians(latitude)) / spatial['dx']
+    return y, x
+
+
+def specific_to_relative_humidity(q: np.ndarray, temperature: np.ndarray,
+                                  pressure: np.ndarray) -> np.ndarray:
+    """Specific humidity (kg/kg) to relative humidity (%), T in K, p in hPa"""
+    vapour_pressure = q * pressure / (0.622 + 0.378 * q)
+    celsius = temperature - 273.15
+    saturation = 6.112 * np.exp(17.67 * celsius / (celsius + 243.5))
+    return np.clip(100.0 * vapour_pressure / saturation, 0.0, 100.0)
+
+
+def relative_to_specific_humidity(rh: np.ndarray, temperature: np.ndarray,
+                                  pressure: np.ndarray) -> np.ndarray:
+    """Relative humidity (%) to specific humidity (kg/kg), T in K, p in hPa"""
+    celsius = temperature - 273.15
+    vapour_pressure = rh / 100.0 * 6.112 * np.exp(17.67 * celsius / (celsius + 243.5))
+    return 0.622 * vapour_pressure / (pressure - 0.378 * vapour_pressure)
+
+
+def bilinear_weights(y: np.ndarray, x: np.ndarray, ny: int, nx: int):
+    """
+    Sparse bilinear interpolation weights from a (ny, nx) grid to points.
+
+    Args:
+        y, x (np.ndarray): Fractional grid coordinates of the points, within the grid
+        ny, nx (int): Grid extent
+
+    Returns:
+        tuple: (rows, cols, weights) triplets of a (points x ny*nx) matrix
+    """
+    y0 = np.clip(np.floor(y).astype(int), 0, max(ny - 2, 0))
+    x0 = np.clip(np.floor(x).astype(int), 0, max(nx - 2, 0))
+    fy, fx = y - y0, x - x0
+    y1 = np.minimum(y0 + 1, ny - 1)
+    x1 = np.minimum(x0 + 1, nx - 1)
+    rows = np.repeat(np.arange(len(y)), 4)
+    cols = np.stack([y0 * nx + x0, y0 * nx + x1, y1 * nx + x0, y1 * nx + x1], axis=1).ravel()
+    weights = np.stack([(1 - fy) * (1 - fx), (1 - fy) * fx,
+                        fy * (1 - fx), fy * fx], axis=1).ravel()
+    return rows, cols, weights
+
+
+class StationSampler:
+    """
+    Samples gridded model fields at station locations through a precomputed
+    sparse interpolation matrix.
+    """
+
+    def __init__(self, config: Dict, stations: Sequence, method: str = 'bilinear'):
+        """
+        Build the interpolation weights.
+
+        Args:
+            config (Dict): v10 configuration with grid geolocation
+            stations (Sequence): Stations or location dicts
+            method (str): 'bilinear' or 'nearest'
+        """
+        if method not in ('bilinear', 'nearest'):
+            raise ValueError(f"Unknown interpolation method '{method}'")
+        self.ny = config['spatial']['ny']
+        self.nx = config['spatial']['nx']
+        self.method = method
+
+        names, lats, lons = station_arrays(stations)
+        y, x = grid_coordinates(config, lats, lons)
+        inside = (y >= 0) & (y <= self.ny - 1) & (x >= 0) & (x <= self.nx - 1)
+        for name in np.asarray(names)[~inside]:
+            logger.warning(f"Station {name} lies outside the model grid and is skipped")
+        self.names = [name for name, keep in zip(names, inside) if keep]
+        y, x = y[inside], x[inside]
+        n = len(self.names)
+
+        if method == 'nearest':
+            rows = np.arange(n)
+            cols = np.rint(y).astype(int) * self.nx + np.rint(x).astype(int)
+            weights = np.ones(n)
+        else:
+            rows, cols, weights = bilinear_weights(y, x, self.ny, self.nx)
+
+        self.weights = sparse.csr_matrix((weights, (rows, cols)), shape=(n, self.ny * self.nx))
+        logger.info(f"Station sampler ready: {n} stations, {method} weights")
+
+    def sample(self, state: AtmosphericState, level: int = 0) -> Dict[str, np.ndarray]:
+        """
+        Interpolate every state field to the stations.
+
+        Args:
+            state (AtmosphericState): Model state shaped (ny, nx, nz)
+            level (int): Model level to sample
+
+        Returns:
+            Dict[str, np.ndarray]: Station values per field, ordered as self.names
+        """
+        if state.ensemble_size is not None:
+            raise ValueError("Sample ensemble members individually or sample the ensemble mean")
+        samples = {}
+        for name in STATE_FIELDS:
+            # Only the sampled level enters the product
+            samples[name] = self.weights @ getattr(state, name)[..., level].reshape(-1)
+        return samples
+
+    def write_atmospheric_state(self, conn, samples: Dict[str, np.ndarray], timestamp: datetime,
+                                user_login: str = 'model') -> int:
+        """
+        Bulk-insert sampled values into atmospheric_state in one statement.
+
+        Values are converted to the units the observations use: temperature in
+        °C and relative humidity in %.
+
+        Args:
+            conn: Open psycopg2 connection
+            samples (Dict[str, np.ndarray]): Output of sample()
+            timestamp (datetime): Valid time of the model state
+            user_login (str): Writer tag stored in user_login (v16 schema);
+                              None for tables without that column
+
+        Returns:
+            int: Number of rows written
+        """
+        temperature = samples['temperature'] - 273.15
+        humidity = specific_to_relative_humidity(samples['humidity'], samples['temperature'],
+                                                 samples['pressure'])
+        columns = ['location_name', 'timestamp', 'temperature', 'pressure',
+                   'wind_u', 'wind_v', 'humidity']
+        rows = zip(self.names, [timestamp] * len(self.names), temperature.tolist(),
+                   samples['pressure'].tolist(), samples['wind_u'].tolist(),
+                   samples['wind_v'].tolist(), humidity.tolist())
+        if user_login is not None:
+            columns.append('user_login')
+            rows = (row + (user_login,) for row in rows)
+        rows = list(rows)
+
+        try:
+            with conn.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    f"INSERT INTO atmospheric_state ({', '.join(columns)}) VALUES %s",
+                    rows,
+                    page_size=max(len(rows), 1)
+                )
+            conn.commit()
+            logger.info(f"Wrote model values for {len(rows)} stations at {timestamp}")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"Error writing station samples: {str(e)}")
+            conn.rollback()
+            raise
+
+
+def fetch_latest_observations(conn, stations: Sequence, table: str = 'atmospheric_state',
+                              exclude_login: Optional[str] = 'model') -> Dict[str, np.ndarray]:
+    """
+    Read the latest observation per station, in model units.
+
+    Args:
+        conn: Open psycopg2 connection
+        stations (Sequence): Stations or location dicts providing coordinates
+        table (str): 'atmospheric_state' (v16) or 'weather_data' (upgrade_database.sql)
+        exclude_login (str): user_login of rows to skip in atmospheric_state, so
+                             model values written by StationSampler are not
+                             analysed as observations; None disables the filter
+
+    Returns:
+        Dict[str, np.ndarray]: 'name', 'latitude', 'longitude' and one array per
+                               state field (K, hPa, m/s, kg/kg) for stations with data
+    """
+    names, lats, lons = station_arrays(stations)
+    if table == 'atmospheric_state':
+        query = """
+            SELECT DISTINCT ON (location_name)
+                location_name, temperature, pressure, wind_u, wind_v, humidity
+            FROM atmospheric_state
+            WHERE location_name = ANY(%s)
+        """
+        params = [names]
+        if exclude_login is not None:
+            query += " AND user_login IS DISTINCT FROM %s"
+            params.append(exclude_login)
+        query += " ORDER BY location_name, timestamp DESC"
+    elif table == 'weather_data':
+        # Wind is stored as speed (km/h, Open-Meteo default) and direction (from)
+        query = """
+            SELECT DISTINCT ON (location)
+                location, temperature, pressure,
+                -wind_speed / 3.6 * SIN(RADIANS(wind_direction)),
+                -wind_speed / 3.6 * COS(RADIANS(wind_direction)),
+                humidity
+            FROM weather_data
+            WHERE location = ANY(%s)
+            ORDER BY location, timestamp DESC
+        """
+        params = [names]
+    else:
+        raise ValueError(f"Unsupported observation table '{table}'")
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(query, params)
+            rows = [row for row in cursor.fetchall() if None not in row]
+    except Exception as e:
+        logger.error(f"Error reading observations from {table}: {str(e)}")
+        raise
+
+    position = {name: i for i, name in enumerate(names)}
+    index = np.array([position[row[0]] for row in rows], dtype=int)
+    values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), 5)
+    temperature = values[:, 0] + 273.15
+    observations = {
+        'name': np.asarray(names, dtype=object)[index],
+        'latitude': lats[index],
+        'longitude': lons[index],
+        'temperature': temperature,
+        'pressure': values[:, 1],
+        'wind_u': values[:, 2],
+        'wind_v': values[:, 3],
+        'humidity': relative_to_specific_humidity(values[:, 4], temperature, values[:, 1])
+    }
+    logger.info(f"Read {len(rows)} of {len(names)} station observations from {table}")
+    return observations
+
+
+class ObjectiveAnalysis:
+    """
+    Spreads station observations onto the model grid.
+
+    Station-to-cell weights are computed once per station layout: a k-d tree
+    finds at most `max_neighbours` stations within `radius` of each cell, and
+    the normalised Barnes (exp(-d²/κ)) or inverse-distance (d^-power) weights
+    are kept as a sparse (cells x stations) matrix. Each analysis is then one
+    sparse-dense product per field applied to the observation increments.
+    """
+
+    def __init__(self, config: Dict, latitude: np.ndarray, longitude: np.ndarray,
+                 method: str = 'barnes', radius: float = 250000.0, max_neighbours: int = 16,
+                 kappa: Optional[float] = None, power: float = 2.0):
+        """
+        Build the analysis weights.
+
+        Args:
+            config (Dict): v10 configuration with grid geolocation
+            latitude, longitude (np.ndarray): Station coordinates
+            method (str): 'barnes' or 'idw'
+            radius (float): Influence radius in metres
+            max_neighbours (int): Maximum stations contributing to a cell
+            kappa (float): Barnes smoothing parameter in m² (default: (radius / 2)²)
+            power (float): Inverse-distance exponent
+        """
+        if method not in ('barnes', 'idw'):
+            raise ValueError(f"Unknown analysis method '{method}'")
+        spatial = config['spatial']
+        self.config = config
+        self.shape = (spatial['ny'], spatial['nx'], spatial['nz'])
+        ny, nx, _ = self.shape
+        n_stations = len(latitude)
+
+        y, x = grid_coordinates(config, latitude, longitude)
+        tree = cKDTree(np.column_stack([y * spatial['dy'], x * spatial['dx']]))
+        cy, cx = np.meshgrid(np.arange(ny) * spatial['dy'], np.arange(nx) * spatial['dx'],
+                             indexing='ij')
+        k = min(max_neighbours, n_stations)
+        distance, station = tree.query(np.column_stack([cy.ravel(), cx.ravel()]), k=k,
+                                       distance_upper_bound=radius, workers=-1)
+        distance = distance.reshape(ny * nx, k)
+        station = station.reshape(ny * nx, k)
+        found = np.isfinite(distance)
+
+        if method == 'barnes':
+            kappa = kappa or (radius / 2) ** 2
+            weights = np.exp(-np.where(found, distance, 0.0) ** 2 / kappa)
+        else:
+            weights = 1.0 / np.maximum(np.where(found, distance, 1.0), 1.0) ** power
+        weights = np.where(found, weights, 0.0)
+        totals = weights.sum(axis=1, keepdims=True)
+        weights = np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+        rows = np.repeat(np.arange(ny * nx), k)[found.ravel()]
+        self.weights = sparse.csr_matrix((weights[found], (rows, station[found])),
+                                         shape=(ny * nx, n_stations))
+        self.coverage = float((totals > 0).mean())
+
+        # Grid-to-station interpolation of a gridded background (stations off
+        # the grid take the nearest edge value)
+        rows, cols, values = bilinear_weights(np.clip(y, 0, ny - 1), np.clip(x, 0, nx - 1), ny, nx)
+        self.background_weights = sparse.csr_matrix((values, (rows, cols)),
+                                                    shape=(n_stations, ny * nx))
+        logger.info(f"Objective analysis ready: {n_stations} stations, {method}, "
+                    f"{self.coverage:.0%} of cells within {radius / 1000:.0f} km of a station")
+
+    def analyze(self, observations: Dict[str, np.ndarray],
+                background: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        Analyse surface fields from station observations.
+
+        Args:
+            observations (Dict[str, np.ndarray]): Station values per field, in the
+                                                  station order used to build the weights
+            background (Dict[str, np.ndarray]): Gridded (ny, nx) first guess per
+                                                field, e.g. the lowest level of a
+                                                previous forecast; default is the
+                                                observation mean everywhere
+
+        Returns:
+            Dict[str, np.ndarray]: Analysed (ny, nx) surface field per name: the
+                                   background plus the spread observation increments
+        """
+        ny, nx, _ = self.shape
+        surface = {}
+        for name in STATE_FIELDS:
+            obs = np.asarray(observations[name], dtype=np.float64)
+            if background is None:
+                first_guess = np.full(ny * nx, obs.mean())
+            else:
+                first_guess = np.asarray(background[name], dtype=np.float64).reshape(ny * nx)
+            increments = self.weights @ (obs - self.background_weights @ first_guess)
+            surface[name] = (first_guess + increments).reshape(ny, nx)
+        return surface
+
+    def initial_state(self, observations: Dict[str, np.ndarray],
+                      timestamp: Optional[datetime] = None) -> AtmosphericState:
+        """
+        Build a model initial state from station observations.
+
+        The analysed surface fields fill the lowest level; temperature follows
+        the standard lapse rate and pressure the hydrostatic scale height with
+        height (level k at k * dz), winds and specific humidity are carried up
+        unchanged.
+
+        Args:
+            observations (Dict[str, np.ndarray]): Output of fetch_latest_observations
+            timestamp (datetime): Analysis time (default: now)
+
+        Returns:
+            AtmosphericState: Initial conditions on the model grid
+        """
+        surface = self.analyze(observations)
+        ny, nx, nz = self.shape
+        height = np.arange(nz) * self.config['spatial'].get('dz', 1000.0)
+        fields = {name: np.empty(self.shape) for name in STATE_FIELDS}
+        fields['temperature'][...] = surface['temperature'][..., None] - LAPSE_RATE * height
+        fields['pressure'][...] = surface['pressure'][..., None] * np.exp(-height / SCALE_HEIGHT)
+        for name in ('wind_u', 'wind_v', 'humidity'):
+            fields[name][...] = surface[name][..., None]
+        return AtmosphericState(**fields, timestamp=timestamp or datetime.now())
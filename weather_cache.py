@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Weather Response Cache
+Author: CossackNikolay
+Created: 2026-10-18
+Description: Two-level cache for Open-Meteo responses used by WeatherFetcher
+            (weather_fetch.py). Entries are keyed by coordinates rounded to the
+            forecast grid resolution plus the requested variables, held in an
+            in-memory LRU and mirrored to disk so restarts stay warm. Freshness
+            follows Cache-Control max-age when the server sends it and a
+            configurable TTL otherwise; stale entries carrying an ETag or
+            Last-Modified are revalidated with a conditional request.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+COORDINATE_KEYS = ("latitude", "longitude")
+
+
+@dataclass
+class CacheEntry:
+    """A cached response with its validators."""
+    data: Any
+    expires: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for revalidating this entry, if it has validators."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """In-memory LRU over an on-disk store of weather responses."""
+
+    def __init__(self,
+                 directory: Optional[str] = "weather_cache",
+                 ttl: float = 3600.0,
+                 max_entries: int = 1024,
+                 precision: int = 2):
+        """
+        Initialize the cache.
+
+        Args:
+            directory (Optional[str]): On-disk cache directory, None for memory only
+            ttl (float): Lifetime in seconds when the server sends no max-age
+            max_entries (int): Entries kept in the memory layer
+            precision (int): Decimal places coordinates are rounded to in the key
+        """
+        self.directory = Path(directory) if directory else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.precision = precision
+        self.memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0,
+                         "revalidated": 0, "stores": 0}
+        self.logger = logging.getLogger(__name__)
+
+    def key(self, params: Dict) -> str:
+        """Cache key: rounded coordinates plus every other query parameter."""
+        normalized = {}
+        for name, value in params.items():
+            if name in COORDINATE_KEYS:
+                value = round(float(value), self.precision)
+            normalized[name] = value
+        return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+    def _count(self, counter: str) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+
+    def lookup(self, params: Dict) -> Optional[CacheEntry]:
+        """
+        Find the entry for a request, fresh or stale.
+
+        Fresh entries count as hits; stale or absent ones as misses.
+
+        Args:
+            params (Dict): Query parameters of a single-location request
+
+        Returns:
+            Optional[CacheEntry]: Cached entry, or None if nothing is cached
+        """
+        key = self.key(params)
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+        layer = "memory_hits"
+        if entry is None and self.directory:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, entry)
+            layer = "disk_hits"
+        self._count(layer if entry is not None and entry.fresh else "misses")
+        return entry
+
+    def get(self, params: Dict) -> Optional[Any]:
+        """Fresh cached data for a request, or None."""
+        entry = self.lookup(params)
+        return entry.data if entry is not None and entry.fresh else None
+
+    def lifetime(self, headers: Dict) -> Optional[float]:
+        """
+        Seconds a response may be cached for, from its Cache-Control header.
+
+        Args:
+            headers (Dict): Response headers
+
+        Returns:
+            Optional[float]: Lifetime, or None if the response must not be stored
+        """
+        control = (headers.get("Cache-Control") or "").lower()
+        if "no-store" in control:
+            return None
+        if "no-cache" in control:
+            return 0.0
+        match = re.search(r"max-age=(\d+)", control)
+        return float(match.group(1)) if match else self.ttl
+
+    def put(self, params: Dict, data: Any, headers: Optional[Dict] = None) -> None:
+        """
+        Store a response.
+
+        Args:
+            params (Dict): Query parameters of a single-location request
+            data (Any): Decoded response
+            headers (Optional[Dict]): Response headers (Cache-Control, ETag, Last-Modified)
+        """
+        headers = headers or {}
+        lifetime = self.lifetime(headers)
+        if lifetime is None:
+            return
+        entry = CacheEntry(data, time.time() + lifetime,
+                           headers.get("ETag"), headers.get("Last-Modified"))
+        self._store(self.key(params), entry)
+
+    def refresh(self, params: Dict, entry: CacheEntry, headers: Optional[Dict] = None) -> Any:
+        """
+        Extend a stale entry after a 304 Not Modified revalidation.
+
+        Args:
+            params (Dict): Query parameters the entry was stored under
+            entry (CacheEntry): The revalidated entry
+            headers (Optional[Dict]): Headers of the 304 response
+
+        Returns:
+            Any: The cached data
+        """
+        headers = headers or {}
+        lifetime = self.lifetime(headers)
+        entry.expires = time.time() + (lifetime or 0.0)
+        entry.etag = headers.get("ETag", entry.etag)
+        entry.last_modified = headers.get("Last-Modified", entry.last_modified)
+        self._store(self.key(params), entry, counter="revalidated")
+        return entry.data
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters."""
+        with self.lock:
+            stats = dict(self.counters)
+        stats["hits"] = stats["memory_hits"] + stats["disk_hits"]
+        return stats
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def _store(self, key: str, entry: CacheEntry, counter: str = "stores") -> None:
+        self._remember(key, entry)
+        self._count(counter)
+        if not self.directory:
+            return
+        path = self.directory / f"{key}.json"
+        tmp = path.with_name(f".{key}.{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(asdict(entry)))
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Could not write cache entry {key}: {e}")
+            tmp.unlink(missing_ok=True)
+
+    def _read_disk(self, key: str) -> Optional[CacheEntry]:
+        path = self.directory / f"{key}.json"
+        try:
+            return CacheEntry(**json.loads(path.read_text()))
+        except FileNotFoundError:
+            return None
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
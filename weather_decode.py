@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Weather Response Decoding
+Author: CossackNikolay
+Created: 2026-10-18
+Description: Decodes Open-Meteo payloads with orjson when it is installed (falling
+            back to the standard json module) and converts the hourly block into a
+            struct-of-arrays: one datetime64 time axis plus one float64 array per
+            variable, checked for consistent lengths. Responses of several locations
+            sharing a time axis stack into (locations, times) arrays, so diagnostics
+            run vectorized over the whole forecast horizon.
+"""
+
+import json
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Any
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+
+def loads(payload) -> Any:
+    """
+    Parse a JSON payload.
+
+    Args:
+        payload (bytes | str): Raw response body
+
+    Returns:
+        Any: Decoded document
+    """
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def decode_response(response) -> Any:
+    """Decode the body of a requests.Response with the fastest available parser."""
+    return loads(response.content)
+
+
+def _time_axis(values: List, utc_offset: int) -> np.ndarray:
+    """UTC datetime64[s] times from ISO-8601 strings or unix seconds."""
+    if values and isinstance(values[0], (int, float)):  # timeformat=unixtime is already UTC
+        return np.array(values, dtype=np.int64).astype("datetime64[s]")
+    return np.array(values, dtype="datetime64[s]") - np.timedelta64(utc_offset, "s")
+
+
+@dataclass
+class HourlyArrays:
+    """Hourly block of one response as a struct-of-arrays."""
+    times: np.ndarray                               # UTC, datetime64[s]
+    columns: Dict[str, np.ndarray] = field(default_factory=dict)  # float64, NaN if missing
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def value(self, name: str, index: int) -> Optional[float]:
+        """One value as a Python float, None where it is missing."""
+        value = self.columns[name][index].item()
+        return None if np.isnan(value) else value
+
+    def stack(self, names: Sequence[str]) -> np.ndarray:
+        """Variables as one (len(names), times) array, NaN for absent ones."""
+        out = np.full((len(names), len(self.times)), np.nan)
+        for i, name in enumerate(names):
+            if name in self.columns:
+                out[i] = self.columns[name]
+        return out
+
+
+def decode_hourly(data: Dict) -> HourlyArrays:
+    """
+    Convert the hourly block of a decoded response into arrays.
+
+    Args:
+        data (Dict): Decoded Open-Meteo response for one location
+
+    Returns:
+        HourlyArrays: Time axis and one float array per hourly variable
+
+    Raises:
+        KeyError: If the response has no hourly block or time axis
+        ValueError: If a variable's length differs from the time axis
+    """
+    hourly = data["hourly"]
+    times = _time_axis(hourly["time"], int(data.get("utc_offset_seconds", 0)))
+    columns = {}
+    for name, values in hourly.items():
+        if name == "time":
+            continue
+        column = np.array(values, dtype=float)  # None becomes NaN
+        if column.shape != times.shape:
+            raise ValueError(f"Hourly '{name}' has {column.size} values for {times.size} times")
+        columns[name] = column
+    return HourlyArrays(times, columns, data.get("latitude"), data.get("longitude"))
+
+
+def current_hour_index(times: np.ndarray, now: Optional[datetime] = None) -> int:
+    """
+    Index of the hour containing `now` in a UTC time axis.
+
+    Args:
+        times (np.ndarray): Increasing UTC valid times (datetime64)
+        now (Optional[datetime]): Naive UTC time (default: current time)
+
+    Returns:
+        int: Index of the last valid time not after `now`, clipped to the axis
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    index = int(np.searchsorted(times, np.datetime64(now, "s"), side="right")) - 1
+    return min(max(index, 0), len(times) - 1)
+
+
+def stack_hourly(blocks: Sequence[HourlyArrays],
+                 names: Sequence[str]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Stack several locations' hourly arrays on their shared time axis.
+
+    Args:
+        blocks (Sequence[HourlyArrays]): One decoded block per location
+        names (Sequence[str]): Variables to stack
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: Shared times and one
+            (locations, times) array per variable, NaN where a location lacks it
+
+    Raises:
+        ValueError: If the blocks do not share the same time axis
+    """
+    if not blocks:
+        return np.array([], dtype="datetime64[s]"), {name: np.empty((0, 0)) for name in names}
+    times = blocks[0].times
+    for block in blocks[1:]:
+        if not np.array_equal(block.times, times):
+            raise ValueError("Hourly blocks have different time axes")
+    stacked = np.stack([block.stack(names) for block in blocks], axis=1)
+    return times, dict(zip(names, stacked))
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Weather Fetch Layer
+Author: CossackNikolay
+Created: 2026-10-18
+Description: Shared HTTP layer for the Open-Meteo fetchers (weather_integration*.py,
+            atmospheric_dynamics_V4.py). One keep-alive requests.Session is reused
+            for every call, so TLS connections are pooled instead of re-opened, and
+            many locations are fetched concurrently on a bounded thread pool.
+            Locations sharing the same variables are grouped into multi-coordinate
+            requests (comma-separated latitude/longitude lists), one result per
+            coordinate, with single-location requests as the fallback. An optional
+            ResponseCache (weather_cache.py) answers repeated requests without
+            touching the network. Every request passes the shared rate limiter and
+            the host's circuit breaker, and 429/5xx/timeouts are retried with
+            jittered backoff within a retry budget (weather_resilience.py).
+"""
+
+import time
+import logging
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from weather_cache import CacheEntry, ResponseCache
+from weather_decode import decode_response
+from weather_replay import ResponseRecorder
+from weather_resilience import (SHARED_RATE_LIMITER, SHARED_RETRY_POLICY, CircuitBreaker,
+                                CircuitOpenError, RetryPolicy, TokenBucket, circuit_breaker)
+
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class WeatherFetcher:
+    """Pooled, concurrent client for the Open-Meteo forecast API."""
+
+    def __init__(self,
+                 api_url: str = OPEN_METEO_URL,
+                 max_concurrency: int = 8,
+                 timeout: float = 10.0,
+                 batch_size: int = 50,
+                 cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 recorder: Optional[ResponseRecorder] = None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            api_url (str): Forecast endpoint
+            max_concurrency (int): Maximum requests in flight (thread and connection pool size)
+            timeout (float): Per-request connect/read timeout in seconds
+            batch_size (int): Maximum coordinates per multi-coordinate request
+            cache (Optional[ResponseCache]): Response cache consulted before every request
+            rate_limiter (Optional[TokenBucket]): Request rate limit (default: process-wide)
+            retry_policy (Optional[RetryPolicy]): Backoff and retry budget (default: process-wide)
+            breaker (Optional[CircuitBreaker]): Circuit breaker (default: process-wide, per host)
+            recorder (Optional[ResponseRecorder]): Archives every upstream response for replay
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.api_url = api_url
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.cache = cache
+        self.rate_limiter = rate_limiter or SHARED_RATE_LIMITER
+        self.retry_policy = retry_policy or SHARED_RETRY_POLICY
+        self.breaker = breaker or circuit_breaker(urlparse(api_url).netloc)
+        self.recorder = recorder
+
+        # One connection per worker thread, kept alive between cycles
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                           thread_name_prefix="weather-fetch")
+        self.logger = logging.getLogger(__name__)
+
+    def _request(self, params: Dict, headers: Optional[Dict] = None) -> requests.Response:
+        """
+        Issue one request through the rate limiter and circuit breaker, retrying
+        429/5xx responses, timeouts and connection errors with backoff.
+        Raises CircuitOpenError while the host's circuit is open, and the last
+        error once retries or the retry budget run out.
+        """
+        self.retry_policy.record_request()
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.get(self.api_url, params=params, headers=headers,
+                                            timeout=self.timeout)
+                if response.status_code in RETRYABLE_STATUS:
+                    retry_after = self._retry_after(response)
+                response.raise_for_status()
+            except (requests.Timeout, requests.ConnectionError, requests.HTTPError) as e:
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and status not in RETRYABLE_STATUS:
+                    self.breaker.record_success()  # Client errors say nothing about host health
+                    raise
+                self.breaker.record_failure()
+                if self.breaker.state == CircuitBreaker.OPEN:
+                    raise
+                delay = self.retry_policy.next_delay(attempt, retry_after)
+                if delay is None:
+                    raise
+                self.logger.warning(f"Weather request failed ({e}); retry {attempt + 1} "
+                                    f"in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except Exception:
+                # Not retried, but a half-open trial must still resolve the breaker
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            if self.recorder is not None:
+                self.recorder.record(response)
+            return response
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Retry-After of a response in seconds, if given as a number."""
+        try:
+            return float(response.headers["Retry-After"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _download(self, params: Dict, entry: Optional[CacheEntry] = None):
+        """
+        Request one response and cache it; raises on failure. A stale cache
+        entry with validators turns the request into a conditional one.
+        """
+        headers = entry.conditional_headers() if entry is not None else {}
+        response = self._request(params, headers or None)
+        if self.cache is None:
+            return decode_response(response)
+        if response.status_code == 304 and entry is not None:
+            return self.cache.refresh(params, entry, response.headers)
+        data = decode_response(response)
+        self.cache.put(params, data, response.headers)
+        return data
+
+    def _fetch_one(self, params: Dict, entry: Optional[CacheEntry] = None) -> Optional[Dict]:
+        """Download one response, logging failures instead of raising."""
+        try:
+            return self._download(params, entry)
+        except CircuitOpenError as e:
+            self.logger.warning(str(e))
+            return None
+        except Exception as e:
+            self.logger.error(f"Error fetching weather data for "
+                              f"({params.get('latitude')}, {params.get('longitude')}): {e}")
+            return None
+
+    def fetch(self, params: Dict) -> Optional[Dict]:
+        """
+        Fetch one forecast, from the cache when it holds a fresh copy.
+
+        Args:
+            params (Dict): Query parameters (latitude, longitude, variables, ...)
+
+        Returns:
+            Optional[Dict]: Decoded JSON response or None if the request fails
+        """
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.lookup(params)
+            if entry is not None and entry.fresh:
+                return entry.data
+        return self._fetch_one(params, entry)
+
+    def fetch_many(self, params_list: List[Dict]) -> List[Optional[Dict]]:
+        """
+        Fetch several forecasts concurrently.
+
+        Args:
+            params_list (List[Dict]): Query parameters per request
+
+        Returns:
+            List[Optional[Dict]]: Responses in request order, None where a request failed
+        """
+        return list(self.executor.map(self.fetch, params_list))
+
+    def _fetch_batch(self, params: Dict, batch: Sequence[Tuple[float, float]]) -> List[Optional[Dict]]:
+        """Fetch one multi-coordinate batch, falling back to single requests."""
+        if len(batch) > 1:
+            try:
+                response = self._request(dict(params,
+                                              latitude=",".join(str(lat) for lat, _ in batch),
+                                              longitude=",".join(str(lon) for _, lon in batch)))
+                data = decode_response(response)
+                if isinstance(data, list) and len(data) == len(batch):
+                    if self.cache is not None:
+                        for (lat, lon), item in zip(batch, data):
+                            self.cache.put(dict(params, latitude=lat, longitude=lon), item,
+                                           response.headers)
+                    return data
+                raise ValueError(f"expected {len(batch)} results, got "
+                                 f"{len(data) if isinstance(data, list) else type(data).__name__}")
+            except CircuitOpenError as e:
+                self.logger.warning(f"Skipping {len(batch)} locations: {e}")
+                return [None] * len(batch)
+            except Exception as e:
+                self.logger.warning(f"Batched request for {len(batch)} locations failed ({e}); "
+                                    f"falling back to single requests")
+        return [self._fetch_one(dict(params, latitude=lat, longitude=lon)) for lat, lon in batch]
+
+    def fetch_locations(self, params: Dict,
+                        coordinates: Sequence[Tuple[float, float]]) -> List[Optional[Dict]]:
+        """
+        Fetch the same variables for many locations in multi-coordinate batches.
+
+        With a cache, fresh entries are served without a request and only the
+        remaining locations are batched. Stale entries are refetched in their
+        batch rather than revalidated one by one, which would cost a request
+        per location; conditional revalidation applies to fetch().
+
+        Args:
+            params (Dict): Query parameters shared by all locations (without coordinates)
+            coordinates (Sequence[Tuple[float, float]]): (latitude, longitude) per location
+
+        Returns:
+            List[Optional[Dict]]: One response per coordinate, in order, None where
+                                  both the batch and the single request failed
+        """
+        results: List[Optional[Dict]] = [None] * len(coordinates)
+        pending = list(range(len(coordinates)))
+        if self.cache is not None:
+            pending = []
+            for i, (lat, lon) in enumerate(coordinates):
+                results[i] = self.cache.get(dict(params, latitude=lat, longitude=lon))
+                if results[i] is None:
+                    pending.append(i)
+
+        batches = [pending[i:i + self.batch_size]
+                   for i in range(0, len(pending), self.batch_size)]
+        fetched = self.executor.map(
+            lambda batch: self._fetch_batch(params, [coordinates[i] for i in batch]), batches)
+
+        for batch, data in zip(batches, fetched):
+            for i, item in zip(batch, data):
+                results[i] = item
+        return results
+
+    def close(self) -> None:
+        """Stop the worker threads and close pooled connections."""
+        self.executor.shutdown()
+        self.session.close()
+        if self.recorder is not None:
+            self.recorder.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
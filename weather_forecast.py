@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Weather Forecast Ingestion
+Author: CossackNikolay
+Created: 2026-10-18
+Description: Turns the hourly block of an Open-Meteo response into columnar NumPy
+            arrays aligned to its time axis, and bulk-upserts the whole forecast
+            horizon into weather_forecast keyed by (location, valid_time, issue_time)
+            (see weather_forecast_table.sql). Also locates the current hour in the
+            time axis, so "current" values are not simply taken from index 0.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from weather_decode import current_hour_index, decode_hourly
+
+logger = logging.getLogger(__name__)
+
+# weather_forecast column -> Open-Meteo hourly variable names (current and legacy)
+FORECAST_COLUMNS = {
+    "temperature": ("temperature_2m",),
+    "humidity": ("relative_humidity_2m", "relativehumidity_2m"),
+    "pressure": ("pressure_msl",),
+    "wind_speed": ("wind_speed_10m", "windspeed_10m"),
+    "wind_direction": ("wind_direction_10m", "winddirection_10m"),
+    "precipitation": ("precipitation",),
+    "precipitation_probability": ("precipitation_probability",),
+    "temperature_80m": ("temperature_80m",),
+    "temperature_120m": ("temperature_120m",),
+    # Derived by WeatherMonitor.add_atmospheric_dynamics_batch (atmospheric_dynamics_V3.py)
+    "lapse_rate": ("lapse_rate",),
+    "stability_code": ("stability_code",),
+}
+
+
+def hourly_columns(data: Dict) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Convert the hourly block of a response into aligned NumPy columns.
+
+    Args:
+        data (Dict): Decoded Open-Meteo response for one location
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: UTC valid times (datetime64[s])
+            and one float array per hourly variable, missing values as NaN
+    """
+    block = decode_hourly(data)
+    return block.times, block.columns
+
+
+def current_hourly_values(data: Dict, now: Optional[datetime] = None) -> Dict[str, float]:
+    """
+    Hourly values at the current hour of a response.
+
+    Args:
+        data (Dict): Decoded Open-Meteo response for one location
+        now (Optional[datetime]): Naive UTC time (default: current time)
+
+    Returns:
+        Dict[str, float]: Value of every hourly variable at the current hour,
+                          None where it is missing
+    """
+    times, columns = hourly_columns(data)
+    index = current_hour_index(times, now)
+    values = {name: column[index].item() for name, column in columns.items()}
+    return {name: None if np.isnan(value) else value for name, value in values.items()}
+
+
+def forecast_rows(location_name: str, data: Dict, issue_time: datetime) -> List[tuple]:
+    """
+    Rows of weather_forecast for the full horizon of one response.
+
+    Args:
+        location_name (str): Name of the location
+        data (Dict): Decoded Open-Meteo response for one location
+        issue_time (datetime): Time the forecast was retrieved (naive UTC)
+
+    Returns:
+        List[tuple]: (location, valid_time, issue_time, *FORECAST_COLUMNS) per hour
+    """
+    times, columns = hourly_columns(data)
+    table = np.full((len(times), len(FORECAST_COLUMNS)), np.nan)
+    for j, aliases in enumerate(FORECAST_COLUMNS.values()):
+        for alias in aliases:
+            if alias in columns:
+                table[:, j] = columns[alias]
+                break
+    values = np.where(np.isnan(table), None, table).tolist()
+    return [(location_name, valid_time, issue_time, *row)
+            for valid_time, row in zip(times.astype(datetime).tolist(), values)]
+
+
+def upsert_forecasts(conn, forecasts: List[Tuple[str, Dict]],
+                     issue_time: Optional[datetime] = None) -> int:
+    """
+    Bulk-upsert the full forecast horizon of several locations.
+
+    Args:
+        conn: Open psycopg2 connection (committed by the caller)
+        forecasts (List[Tuple[str, Dict]]): (location name, response) pairs
+        issue_time (Optional[datetime]): Retrieval time (default: current hour, UTC);
+                                         refetches within the hour update in place
+
+    Returns:
+        int: Number of rows written
+    """
+    if issue_time is None:
+        issue_time = datetime.now(timezone.utc).replace(tzinfo=None, minute=0,
+                                                         second=0, microsecond=0)
+    rows = []
+    for location_name, data in forecasts:
+        try:
+            rows.extend(forecast_rows(location_name, data, issue_time))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Skipping malformed forecast for {location_name}: {e}")
+    if not rows:
+        return 0
+
+    columns = ", ".join(FORECAST_COLUMNS)
+    # Writers fill different columns (e.g. only WeatherMonitor derives the
+    # stability diagnostics), so missing values never erase stored ones
+    updates = ", ".join(f"{name} = COALESCE(EXCLUDED.{name}, weather_forecast.{name})"
+                        for name in FORECAST_COLUMNS)
+    with conn.cursor() as cur:
+        execute_values(cur, f"""
+            INSERT INTO weather_forecast (location_name, valid_time, issue_time, {columns})
+            VALUES %s
+            ON CONFLICT (location_name, valid_time, issue_time) DO UPDATE SET {updates}
+        """, rows, page_size=1000)
+    logger.info(f"Upserted {len(rows)} forecast rows for {len(forecasts)} locations")
+    return len(rows)
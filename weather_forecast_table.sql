@@ -0,0 +1,25 @@
+-- Full hourly forecast horizon per location (weather_forecast.py)
+CREATE TABLE IF NOT EXISTS weather_forecast (
+    location_name VARCHAR(100) NOT NULL,
+    valid_time TIMESTAMP NOT NULL,
+    issue_time TIMESTAMP NOT NULL,
+    temperature FLOAT,
+    humidity FLOAT,
+    pressure FLOAT,
+    wind_speed FLOAT,
+    wind_direction FLOAT,
+    precipitation FLOAT,
+    precipitation_probability FLOAT,
+    temperature_80m FLOAT,
+    temperature_120m FLOAT,
+    lapse_rate FLOAT,
+    stability_code SMALLINT,
+    PRIMARY KEY (location_name, valid_time, issue_time)
+);
+
+-- Tables created before the stability diagnostics were added
+ALTER TABLE weather_forecast
+    ADD COLUMN IF NOT EXISTS lapse_rate FLOAT,
+    ADD COLUMN IF NOT EXISTS stability_code SMALLINT;
+
+CREATE INDEX IF NOT EXISTS idx_forecast_valid_time ON weather_forecast(valid_time);
@@ -7,7 +7,6 @@ Description: Main integration module for weather monitoring system with OpenMete
             and AtmosphericDynamicsModule support.
 """
 
-import requests
 import pandas as pd
 import psycopg2
 from datetime import datetime
@@ -17,7 +16,16 @@ import json
 import logging
 from typing import Dict, Optional, List
 import numpy as np
-from atmospheric_dynamics import AtmosphericDynamicsModule
+from atmospheric_dynamics_V3 import AtmosphericDynamicsModule
+from weather_fetch import OPEN_METEO_URL, WeatherFetcher
+from weather_cache import ResponseCache
+from weather_replay import ResponseRecorder
+from weather_decode import current_hour_index, decode_hourly, stack_hourly
+from weather_forecast import upsert_forecasts
+
+# Hourly temperatures forming the stability profile, and their heights in m
+PROFILE_VARIABLES = ("temperature_2m", "temperature_80m", "temperature_120m")
+PROFILE_HEIGHTS = (2, 80, 120)
 
 # Configure logging
 logging.basicConfig(
@@ -34,7 +42,13 @@ class WeatherMonitor:
                  db_password: str = "your_password",
                  db_host: str = "localhost",
                  db_port: str = "5432",
-                 db_name: str = "weather_monitor"):
+                 db_name: str = "weather_monitor",
+                 max_concurrency: int = 8,
+                 request_timeout: float = 10.0,
+                 cache_dir: Optional[str] = "weather_cache",
+                 cache_ttl: float = 3600.0,
+                 api_url: str = OPEN_METEO_URL,
+                 record_path: Optional[str] = None):
         """
         Initialize WeatherMonitor with database configuration and locations.
         
@@ -44,6 +58,12 @@ class WeatherMonitor:
             db_host (str): Database host address
             db_port (str): Database port
             db_name (str): Database name
+            max_concurrency (int): Maximum concurrent API requests
+            request_timeout (float): Per-request timeout in seconds
+            cache_dir (Optional[str]): Response cache directory, None to keep it in memory only
+            cache_ttl (float): Response lifetime in seconds when the API sends no max-age
+            api_url (str): Forecast endpoint, e.g. a ReplayServer url for offline runs
+            record_path (Optional[str]): Archive raw API responses here for later replay
         """
         self.db_params = {
             "dbname": db_name,
@@ -60,7 +80,16 @@ class WeatherMonitor:
             {"name": "Tokyo", "lat": 35.6762, "lon": 139.6503}
         ]
         
-        self.api_url = "https://api.open-meteo.com/v1/forecast"
+        self.api_url = api_url
+        recorder = ResponseRecorder(record_path) if record_path else None
+        self.fetcher = WeatherFetcher(self.api_url, max_concurrency, request_timeout,
+                                      cache=ResponseCache(cache_dir, ttl=cache_ttl),
+                                      recorder=recorder)
+        self.request_params = {
+            "current_weather": True,
+            "hourly": "temperature_2m,relativehumidity_2m,windspeed_10m,"
+                     "precipitation_probability,pressure_msl,temperature_80m,temperature_120m"
+        }
         self.atmospheric_dynamics = AtmosphericDynamicsModule()
         self.logger = logging.getLogger(__name__)
 
@@ -96,6 +125,32 @@ class WeatherMonitor:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                
+                # Create forecast horizon table (weather_forecast_table.sql)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS weather_forecast (
+                        location_name VARCHAR(100) NOT NULL,
+                        valid_time TIMESTAMP NOT NULL,
+                        issue_time TIMESTAMP NOT NULL,
+                        temperature FLOAT,
+                        humidity FLOAT,
+                        pressure FLOAT,
+                        wind_speed FLOAT,
+                        wind_direction FLOAT,
+                        precipitation FLOAT,
+                        precipitation_probability FLOAT,
+                        temperature_80m FLOAT,
+                        temperature_120m FLOAT,
+                        lapse_rate FLOAT,
+                        stability_code SMALLINT,
+                        PRIMARY KEY (location_name, valid_time, issue_time)
+                    )
+                """)
+                cur.execute("""
+                    ALTER TABLE weather_forecast
+                        ADD COLUMN IF NOT EXISTS lapse_rate FLOAT,
+                        ADD COLUMN IF NOT EXISTS stability_code SMALLINT
+                """)
                 conn.commit()
                 self.logger.info("Database tables initialized successfully")
                 
@@ -116,48 +171,96 @@ class WeatherMonitor:
         Returns:
             Optional[Dict]: Weather data dictionary or None if fetch fails
         """
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "current_weather": True,
-            "hourly": "temperature_2m,relativehumidity_2m,windspeed_10m,"
-                     "precipitation_probability,pressure_msl,temperature_80m,temperature_120m"
-        }
+        data = self.fetcher.fetch(self.build_request_params(latitude, longitude))
+        return self.add_atmospheric_dynamics(data, latitude)
+
+    def build_request_params(self, latitude: float, longitude: float) -> Dict:
+        """
+        Build the OpenMeteo query for one location.
         
-        try:
-            response = requests.get(self.api_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        Args:
+            latitude (float): Location latitude
+            longitude (float): Location longitude
             
-            # Add atmospheric dynamics calculations
-            if data:
-                temp_profile = [
-                    data['hourly']['temperature_2m'][0],
-                    data['hourly']['temperature_80m'][0],
-                    data['hourly']['temperature_120m'][0]
-                ]
-                height_profile = [2, 80, 120]
-                
-                stability = self.atmospheric_dynamics.calculate_atmospheric_stability(
-                    temp_profile,
-                    height_profile
-                )
-                
-                coriolis = self.atmospheric_dynamics.calculate_coriolis_force(
-                    data['current_weather']['windspeed'],
-                    latitude
-                )
-                
-                data['atmospheric_dynamics'] = {
-                    'stability': stability,
-                    'coriolis_force': coriolis
-                }
+        Returns:
+            Dict: Query parameters
+        """
+        return dict(self.request_params, latitude=latitude, longitude=longitude)
+
+    def add_atmospheric_dynamics(self, data: Optional[Dict], latitude: float) -> Optional[Dict]:
+        """
+        Add stability and Coriolis diagnostics to a fetched response.
+        
+        Args:
+            data (Optional[Dict]): OpenMeteo response, or None if the fetch failed
+            latitude (float): Location latitude
             
-            return data
+        Returns:
+            Optional[Dict]: Weather data dictionary or None if processing fails
+        """
+        return self.add_atmospheric_dynamics_batch([data], [latitude])[0]
+
+    def add_atmospheric_dynamics_batch(self, responses: List[Optional[Dict]],
+                                       latitudes: List[float]) -> List[Optional[Dict]]:
+        """
+        Add stability and Coriolis diagnostics to many fetched responses.
+        
+        Locations sharing a time axis are classified over their full forecast
+        horizon in one vectorized call. Each result is a new dict layered over
+        the response, which stays untouched since it may be held by the response
+        cache: its hourly block gains the lapse rate and stability code as
+        derived variables (stored with the forecast), and atmospheric_dynamics
+        and current_hourly hold the current hour's values.
+        
+        Args:
+            responses (List[Optional[Dict]]): OpenMeteo responses, None where a fetch failed
+            latitudes (List[float]): Latitude of each location
             
-        except Exception as e:
-            self.logger.error(f"Error fetching weather data: {e}")
-            return None
+        Returns:
+            List[Optional[Dict]]: Weather data per location, None where processing fails
+        """
+        results = [None] * len(responses)
+        groups = {}
+        for i, data in enumerate(responses):
+            if not data:
+                continue
+            try:
+                block = decode_hourly(data)
+            except (KeyError, TypeError, ValueError) as e:
+                self.logger.error(f"Error processing weather data: {e}")
+                continue
+            groups.setdefault(block.times.tobytes(), []).append((i, block))
+
+        dynamics = self.atmospheric_dynamics
+        for members in groups.values():
+            indices = [i for i, _ in members]
+            times, stacked = stack_hourly([block for _, block in members], PROFILE_VARIABLES)
+            temperature = np.stack([stacked[name] for name in PROFILE_VARIABLES], axis=1)
+            codes, lapse_rate = dynamics.calculate_atmospheric_stability_batch(
+                temperature, PROFILE_HEIGHTS
+            )
+            # A location without current weather only loses its Coriolis force
+            wind_speed = [(responses[i].get('current_weather') or {}).get('windspeed')
+                          for i in indices]
+            coriolis = dynamics.calculate_coriolis_force_batch(
+                np.array(wind_speed, dtype=float), [latitudes[i] for i in indices]
+            )
+
+            now = current_hour_index(times)
+            for k, (i, block) in enumerate(members):
+                data = responses[i]
+                stability_code = np.where(codes[k] == dynamics.UNKNOWN, np.nan, codes[k])
+                results[i] = dict(
+                    data,
+                    hourly=dict(data['hourly'], lapse_rate=lapse_rate[k].tolist(),
+                                stability_code=stability_code.tolist()),
+                    atmospheric_dynamics={
+                        'stability': dynamics.stability_label(codes[k, now]),
+                        'coriolis_force': None if np.isnan(coriolis[k]) else coriolis[k].item()
+                    },
+                    current_hourly={name: block.value(name, now) for name in block.columns}
+                )
+        return results
 
     def save_weather_data(self, location_name: str, weather_data: Dict) -> bool:
         """
@@ -185,9 +288,9 @@ class WeatherMonitor:
                 """, (
                     location_name,
                     weather_data['current_weather']['temperature'],
-                    weather_data['hourly']['relativehumidity_2m'][0],
+                    weather_data['current_hourly']['relativehumidity_2m'],
                     weather_data['current_weather']['windspeed'],
-                    weather_data['hourly']['precipitation_probability'][0],
+                    weather_data['current_hourly']['precipitation_probability'],
                     weather_data['atmospheric_dynamics']['stability'],
                     weather_data['atmospheric_dynamics']['coriolis_force']
                 ))
@@ -202,13 +305,53 @@ class WeatherMonitor:
             if conn:
                 conn.close()
 
+    def save_forecasts(self, forecasts: List[tuple]) -> bool:
+        """
+        Bulk-upsert the full hourly horizon of several locations.
+        
+        Args:
+            forecasts (List[tuple]): (location name, weather data) pairs
+            
+        Returns:
+            bool: True if save successful, False otherwise
+        """
+        if not forecasts:
+            return False
+        
+        conn = None
+        try:
+            conn = psycopg2.connect(**self.db_params)
+            upsert_forecasts(conn, forecasts)
+            conn.commit()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving forecasts: {e}")
+            if conn:
+                conn.rollback()
+            return False
+        finally:
+            if conn:
+                conn.close()
+
     def update_all_locations(self) -> None:
         """Update weather data for all configured locations."""
-        for location in self.locations:
-            weather_data = self.fetch_weather_data(location['lat'], location['lon'])
+        responses = self.fetcher.fetch_locations(
+            self.request_params,
+            [(location['lat'], location['lon']) for location in self.locations]
+        )
+        # Classify every location's full horizon at once
+        responses = self.add_atmospheric_dynamics_batch(
+            responses, [location['lat'] for location in self.locations]
+        )
+        forecasts = []
+        for location, weather_data in zip(self.locations, responses):
             if weather_data:
                 self.save_weather_data(location['name'], weather_data)
-        self.logger.info("Completed update for all locations")
+                forecasts.append((location['name'], weather_data))
+        
+        # Keep the whole hourly horizon, not just the current hour
+        self.save_forecasts(forecasts)
+        self.logger.info(f"Completed update for all locations (cache: {self.fetcher.cache.stats()})")
 
     def run(self, update_interval: int = 30) -> None:
         """
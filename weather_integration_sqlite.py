@@ -6,7 +6,9 @@ Created: 2025-02-10
 Description: Simplified weather monitoring system using SQLite database
 """
 
-import requests
+from weather_fetch import WeatherFetcher
+from weather_cache import ResponseCache
+from weather_decode import current_hour_index, decode_hourly
 import sqlite3
 from datetime import datetime
 import time
@@ -42,6 +44,11 @@ class WeatherMonitor:
         ]
         
         self.api_url = "https://api.open-meteo.com/v1/forecast"
+        self.fetcher = WeatherFetcher(self.api_url, cache=ResponseCache())
+        self.request_params = {
+            "current_weather": True,
+            "hourly": "temperature_2m,relativehumidity_2m,windspeed_10m,precipitation_probability"
+        }
         self.logger = logging.getLogger(__name__)
 
     def init_database(self) -> None:
@@ -83,21 +90,7 @@ class WeatherMonitor:
         Returns:
             Optional[Dict]: Weather data dictionary or None if fetch fails
         """
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "current_weather": True,
-            "hourly": "temperature_2m,relativehumidity_2m,windspeed_10m,precipitation_probability"
-        }
-        
-        try:
-            response = requests.get(self.api_url, params=params)
-            response.raise_for_status()
-            return response.json()
-            
-        except Exception as e:
-            self.logger.error(f"Error fetching weather data: {e}")
-            return None
+        return self.fetcher.fetch(dict(self.request_params, latitude=latitude, longitude=longitude))
 
     def save_weather_data(self, location_name: str, weather_data: Dict) -> bool:
         """
@@ -113,7 +106,11 @@ class WeatherMonitor:
         if not weather_data:
             return False
         
+        conn = None
         try:
+            hourly = decode_hourly(weather_data)
+            now = current_hour_index(hourly.times)
+
             conn = sqlite3.connect(self.db_path)
             cur = conn.cursor()
             
@@ -124,9 +121,9 @@ class WeatherMonitor:
             """, (
                 location_name,
                 weather_data['current_weather']['temperature'],
-                weather_data['hourly']['relativehumidity_2m'][0],
+                hourly.value('relativehumidity_2m', now),
                 weather_data['current_weather']['windspeed'],
-                weather_data['hourly']['precipitation_probability'][0]
+                hourly.value('precipitation_probability', now)
             ))
             
             conn.commit()
@@ -137,15 +134,19 @@ class WeatherMonitor:
             self.logger.error(f"Error saving weather data: {e}")
             return False
         finally:
-            conn.close()
+            if conn is not None:
+                conn.close()
 
     def update_all_locations(self) -> None:
         """Update weather data for all configured locations."""
-        for location in self.locations:
-            weather_data = self.fetch_weather_data(location['lat'], location['lon'])
+        responses = self.fetcher.fetch_locations(
+            self.request_params,
+            [(location['lat'], location['lon']) for location in self.locations]
+        )
+        for location, weather_data in zip(self.locations, responses):
             if weather_data:
                 self.save_weather_data(location['name'], weather_data)
-        self.logger.info("Completed update for all locations")
+        self.logger.info(f"Completed update for all locations (cache: {self.fetcher.cache.stats()})")
 
     def run(self, update_interval: int = 30) -> None:
         """
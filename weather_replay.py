@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Weather Record and Replay
+Author: CossackNikolay
+Created: 2026-10-18
+Description: Offline stand-in for the Open-Meteo API, for testing and benchmarking
+            the fetch-and-store pipeline without network access.
+            - ResponseRecorder: attached to a WeatherFetcher (weather_fetch.py), it
+              appends every upstream response with its query string, status,
+              caching headers and latency to a gzip-compressed JSON-lines archive
+            - ReplayServer: local HTTP server answering from an archive, with
+              latencies divided by a speed-up factor and a cap on requests served
+              concurrently; repeated queries cycle through their recordings
+
+Usage:
+    # Record while running normally
+    monitor = WeatherMonitor(..., record_path="responses.jsonl.gz")
+
+    # Replay at 100x real time
+    with ReplayServer("responses.jsonl.gz", speedup=100, concurrency=8) as server:
+        monitor = WeatherMonitor(..., api_url=server.url, cache_ttl=0)
+        monitor.update_all_locations()
+
+    # Or serve an archive from the command line
+    python weather_replay.py responses.jsonl.gz --speedup 100 --port 8080
+"""
+
+import gzip
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import cycle
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+RECORDED_HEADERS = ("Content-Type", "Cache-Control", "ETag", "Last-Modified")
+
+
+def query_key(query: str) -> Tuple[Tuple[str, str], ...]:
+    """Order-independent key of a URL query string."""
+    return tuple(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+class ResponseRecorder:
+    """Appends raw upstream responses to a compressed archive."""
+
+    def __init__(self, path: str):
+        """
+        Open the archive for appending.
+
+        Args:
+            path (str): Archive file (gzip-compressed JSON lines)
+        """
+        self.path = path
+        self.file = gzip.open(path, "at", encoding="utf-8")
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def record(self, response) -> None:
+        """
+        Append one response; revalidations (304) and other bodiless
+        responses are skipped, since replay must answer unconditional requests.
+
+        Args:
+            response (requests.Response): Response of a completed request
+        """
+        if not 200 <= response.status_code < 300 or not response.content:
+            return
+        entry = {
+            "query": urlsplit(response.request.url).query,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in RECORDED_HEADERS
+                        if name in response.headers},
+            "elapsed": response.elapsed.total_seconds(),
+            "recorded": time.time(),
+            "body": response.text,
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()  # Readable up to here even if the process dies
+            self.count += 1
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+        logger.info(f"Recorded {self.count} responses to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_archive(path: str) -> Dict[tuple, List[Dict]]:
+    """
+    Read an archive, grouping recordings by query.
+
+    Args:
+        path (str): Archive written by ResponseRecorder
+
+    Returns:
+        Dict[tuple, List[Dict]]: Recordings per query key, in recording order
+    """
+    entries = defaultdict(list)
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                entry = json.loads(line)
+                if not 200 <= entry["status"] < 300 or not entry["body"]:
+                    continue  # Bodiless revalidation recorded by an older recorder
+                entry["body"] = entry["body"].encode()
+                entries[query_key(entry["query"])].append(entry)
+        except (EOFError, ValueError) as e:  # Recorder was not closed cleanly
+            logger.warning(f"Archive {path} ends with a truncated record ({e}); ignoring it")
+    return dict(entries)
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server: "_ReplayHTTPServer"
+
+    def do_GET(self):
+        entry = self.server.next_entry(urlsplit(self.path).query)
+        if entry is None:
+            self.send_error(404, "No recorded response for this query")
+            return
+        with self.server.slots:
+            time.sleep(entry["elapsed"] / self.server.speedup)
+            etag = entry["headers"].get("ETag")
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(entry["status"])
+            for name, value in entry["headers"].items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(entry["body"])))
+            self.end_headers()
+            self.wfile.write(entry["body"])
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class _ReplayHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, entries, speedup, concurrency):
+        super().__init__(address, _ReplayHandler)
+        self.speedup = speedup
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.queues = {key: cycle(recordings) for key, recordings in entries.items()}
+        self.served = 0
+        self.missed = 0
+
+    def next_entry(self, query: str):
+        with self.lock:
+            queue = self.queues.get(query_key(query))
+            if queue is None:
+                self.missed += 1
+                return None
+            self.served += 1
+            return next(queue)
+
+
+class ReplayServer:
+    """Serves recorded responses on a local port."""
+
+    def __init__(self,
+                 archive: str,
+                 speedup: float = 1.0,
+                 concurrency: int = 8,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        """
+        Load an archive and bind the server.
+
+        Args:
+            archive (str): Archive written by ResponseRecorder
+            speedup (float): Factor recorded latencies are divided by
+            concurrency (int): Maximum requests answered at once
+            host (str): Interface to bind
+            port (int): Port to bind, 0 for any free port
+        """
+        if speedup <= 0 or concurrency < 1:
+            raise ValueError("speedup must be positive and concurrency at least 1")
+        entries = load_archive(archive)
+        self.httpd = _ReplayHTTPServer((host, port), entries, speedup, concurrency)
+        self.thread = None
+        logger.info(f"Loaded {sum(map(len, entries.values()))} responses "
+                    f"for {len(entries)} queries from {archive}")
+
+    @property
+    def url(self) -> str:
+        """Endpoint to use as a WeatherFetcher api_url."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1/forecast"
+
+    def stats(self) -> Dict[str, int]:
+        """Requests served from the archive and requests with no recording."""
+        with self.httpd.lock:
+            return {"served": self.httpd.served, "missed": self.httpd.missed}
+
+    def start(self) -> "ReplayServer":
+        """Serve from a background thread."""
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       name="weather-replay", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Replay recorded Open-Meteo responses")
+    parser.add_argument("archive", help="Archive written by ResponseRecorder")
+    parser.add_argument("--speedup", type=float, default=1.0,
+                        help="Divide recorded latencies by this factor")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="Maximum requests answered at once")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = ReplayServer(args.archive, args.speedup, args.concurrency, args.host, args.port)
+    logger.info(f"Replaying at {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        logger.info(f"Replay stopped ({server.stats()})")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
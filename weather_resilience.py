@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Weather Fetch Resilience
+Author: CossackNikolay
+Created: 2026-10-18
+Description: Flow control for upstream weather requests (weather_fetch.py):
+            - TokenBucket: rate limiter, one shared instance across all fetchers
+            - RetryPolicy: jittered exponential backoff, honouring Retry-After,
+              with a retry budget so retries stay a bounded fraction of traffic
+            - CircuitBreaker: per-host breaker that fails fast while a host is
+              down and lets a single trial call through after a cool-down
+"""
+
+import time
+import random
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base: float, cap: float,
+                  rng: Optional[random.Random] = None) -> float:
+    """
+    Full-jitter exponential backoff.
+
+    Args:
+        attempt (int): Zero-based retry attempt
+        base (float): Delay scale of the first attempt in seconds
+        cap (float): Maximum delay in seconds
+        rng (Optional[random.Random]): Random source (default: module random)
+
+    Returns:
+        float: Delay drawn uniformly from [0, min(cap, base * 2**attempt)]
+    """
+    return (rng or random).uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit is open."""
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter."""
+
+    def __init__(self, rate: float = 5.0, capacity: float = 10.0):
+        """
+        Initialize the bucket, full.
+
+        Args:
+            rate (float): Tokens added per second (sustained requests per second)
+            capacity (float): Maximum burst size
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens, sleeping until they are available.
+
+        Args:
+            tokens (float): Tokens to take
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter, bounded by a shared retry budget."""
+
+    def __init__(self,
+                 max_attempts: int = 4,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30.0,
+                 budget_ratio: float = 0.2,
+                 budget_capacity: float = 10.0):
+        """
+        Initialize the policy.
+
+        Args:
+            max_attempts (int): Attempts per request, including the first
+            base_delay (float): Backoff scale of the first retry in seconds
+            max_delay (float): Maximum backoff in seconds
+            budget_ratio (float): Retry credit earned per first attempt; in steady
+                                  state at most this fraction of requests are retries
+            budget_capacity (float): Maximum banked retry credit
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_capacity = budget_capacity
+        self.budget = budget_capacity
+        self.lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """Credit the budget for a first attempt."""
+        with self.lock:
+            self.budget = min(self.budget_capacity, self.budget + self.budget_ratio)
+
+    def next_delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Delay before retry number `attempt`, spending one unit of budget.
+
+        Args:
+            attempt (int): Zero-based retry attempt
+            retry_after (Optional[float]): Server-requested delay (Retry-After)
+
+        Returns:
+            Optional[float]: Seconds to wait, or None if no retry is allowed
+        """
+        if attempt + 1 >= self.max_attempts:
+            return None
+        with self.lock:
+            if self.budget < 1:
+                logger.warning("Retry budget exhausted; not retrying")
+                return None
+            self.budget -= 1
+        delay = backoff_delay(attempt, self.base_delay, self.max_delay)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one host."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        """
+        Initialize the breaker, closed.
+
+        Args:
+            name (str): Host the breaker protects (for logging)
+            failure_threshold (int): Consecutive failures that open the circuit
+            reset_timeout (float): Seconds open before a trial call is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN  # This caller makes the trial call
+                logger.info(f"Circuit for {self.name} half-open; trying one call")
+                return
+            raise CircuitOpenError(f"Circuit for {self.name} is {self.state}; skipping call")
+
+    def record_success(self) -> None:
+        with self.lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit for {self.name} opened after "
+                                   f"{self.failures} consecutive failures")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+# Shared by every fetcher in the process unless one is given its own
+SHARED_RATE_LIMITER = TokenBucket()
+SHARED_RETRY_POLICY = RetryPolicy()
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def circuit_breaker(host: str) -> CircuitBreaker:
+    """The process-wide circuit breaker of a host."""
+    with _BREAKERS_LOCK:
+        if host not in _BREAKERS:
+            _BREAKERS[host] = CircuitBreaker(host)
+        return _BREAKERS[host]